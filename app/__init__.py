@@ -1,13 +1,22 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_bootstrap import Bootstrap
+from sqlalchemy import event
+from sqlalchemy.schema import CreateIndex
+import logging
+import os
+import threading
+import time
 import toml
 
+logger = logging.getLogger(__name__)
+
 # Initialize Flask extensions
 db = SQLAlchemy()
 bootstrap = Bootstrap()
 
 def create_app():
+    start = time.perf_counter()
     app = Flask(__name__)
     
     # Load configuration from TOML file
@@ -18,6 +27,7 @@ def create_app():
     app.config['SQLALCHEMY_DATABASE_URI'] = config['app']['database_url']
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['BOOTSTRAP_SERVE_LOCAL'] = True
+    app.config['TIMING_HEADER'] = config.get('metrics', {}).get('timing_header', False)
     
     # Initialize extensions
     db.init_app(app)
@@ -32,6 +42,82 @@ def create_app():
     
     # Create database tables
     with app.app_context():
+        if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+            _configure_sqlite(db.engine, config.get('sqlite', {}))
         db.create_all()
+        _create_missing_indexes()
+    
+    # Index task changes in the background once they are committed
+    indexer_config = config.get('indexer', {})
+    if indexer_config.get('enabled', True):
+        from app.indexer import start_indexer
+        start_indexer(
+            app,
+            _indexer_vector_store,
+            os.path.join('vector_db', 'store.sqlite'),
+            batch_size=indexer_config.get('batch_size', 200),
+            delay=indexer_config.get('delay_seconds', 0.2),
+            poll_interval=indexer_config.get('poll_seconds', 1.0)
+        )
+    
+    # Optionally load the NLP processor and vector index in the background
+    if config['app'].get('warm_on_startup', False):
+        threading.Thread(target=_warm_nlp, name='nlp-warmup', daemon=True).start()
+    
+    app.config['STARTUP_SECONDS'] = time.perf_counter() - start
+    logger.info("App created in %.1fms", app.config['STARTUP_SECONDS'] * 1000)
     
     return app
+
+SQLITE_PRODUCTION_PRAGMAS = {
+    'journal_mode': 'WAL',       # readers are not blocked by a writer
+    'synchronous': 'NORMAL',     # durable at checkpoints, safe with WAL
+    'busy_timeout': 5000,        # ms to wait on a locked database
+    'cache_size': -64000,        # negative means KiB, so 64 MB of page cache
+    'mmap_size': 268435456,      # map up to 256 MB of the database file
+    'temp_store': 'MEMORY',
+}
+
+def _configure_sqlite(engine, sqlite_config):
+    """Apply the production SQLite pragmas to every new connection.
+
+    Values can be overridden, or the profile disabled with
+    ``enabled = false``, in the [sqlite] section of config.toml.
+    """
+    if not sqlite_config.get('enabled', True):
+        return
+
+    pragmas = dict(SQLITE_PRODUCTION_PRAGMAS)
+    pragmas.update({key: value for key, value in sqlite_config.items() if key != 'enabled'})
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    # Connections opened before the listener was registered miss the pragmas
+    engine.dispose()
+
+def _create_missing_indexes():
+    """Create indexes added to the models after their tables already existed."""
+    # IF NOT EXISTS rather than checkfirst: reflection does not see expression indexes
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                connection.execute(CreateIndex(index, if_not_exists=True))
+
+def _indexer_vector_store():
+    from app.routes import get_nlp
+    return get_nlp().vector_store
+
+def _warm_nlp():
+    """Construct the shared NLPProcessor and load its vector store."""
+    from app.routes import get_nlp
+    start = time.perf_counter()
+    try:
+        get_nlp().warm()
+        logger.info("NLP processor warmed in %.1fms", (time.perf_counter() - start) * 1000)
+    except Exception as e:
+        print(f"Error warming NLP processor: {str(e)}")
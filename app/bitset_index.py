@@ -0,0 +1,110 @@
+from typing import Iterable, List, Optional, Tuple
+import heapq
+import numpy as np
+from .inverted_index import _top_candidates
+
+if hasattr(np, 'bitwise_count'):
+    def popcount(words: np.ndarray) -> np.ndarray:
+        """Number of set bits in each row of a uint64 array."""
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+else:
+    # numpy < 2.0 has no popcount ufunc; count bits a byte at a time instead
+    _BYTE_POPCOUNT = np.array([bin(byte).count('1') for byte in range(256)], dtype=np.uint8)
+
+    def popcount(words: np.ndarray) -> np.ndarray:
+        """Number of set bits in each row of a uint64 array."""
+        words = np.ascontiguousarray(words)
+        return _BYTE_POPCOUNT[words.view(np.uint8)].sum(axis=-1, dtype=np.int64)
+
+
+class BitsetIndex:
+    """Binary term vectors packed 64 terms to a uint64 word.
+
+    Similarity is AND plus popcount over only the words the query touches,
+    divided by cached per-row popcounts, which gives the same cosine scores
+    as a dense float64 dot product over the 0/1 matrix
+    (see ``benchmarks.similarity_kernels.dense_similarity``).
+    """
+
+    def __init__(self, n_terms: int = 0):
+        self.words = np.zeros((0, _n_words(n_terms)), dtype=np.uint64)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @classmethod
+    def from_inverted_index(cls, inverted_index, n_terms: int) -> 'BitsetIndex':
+        """Pack the documents of an InvertedIndex."""
+        index = cls(n_terms)
+        index._reserve(len(inverted_index), n_terms)
+        for term_id in inverted_index.terms():
+            docs = inverted_index._term_docs(term_id)
+            index.words[docs, term_id >> 6] |= np.uint64(1 << (term_id & 63))
+        index.counts[:len(inverted_index)] = inverted_index.lengths()
+        index._size = len(inverted_index)
+        return index
+
+    def add(self, term_ids: Iterable[int]) -> int:
+        """Add a document and return its position."""
+        unique_ids = sorted(set(int(term_id) for term_id in term_ids))
+        doc = self._size
+        self._reserve(doc + 1, unique_ids[-1] + 1 if unique_ids else 0)
+        for term_id in unique_ids:
+            self.words[doc, term_id >> 6] |= np.uint64(1 << (term_id & 63))
+        self.counts[doc] = len(unique_ids)
+        self._size += 1
+        return doc
+
+    def _reserve(self, n_docs: int, n_terms: int) -> None:
+        """Grow storage, doubling the row capacity so appends stay amortized O(1)."""
+        rows, width = self.words.shape
+        new_width = max(width, _n_words(n_terms))
+        new_rows = rows if n_docs <= rows else max(n_docs, rows * 2, 16)
+        if (new_rows, new_width) == (rows, width):
+            return
+        words = np.zeros((new_rows, new_width), dtype=np.uint64)
+        words[:rows, :width] = self.words
+        counts = np.zeros(new_rows, dtype=np.int64)
+        counts[:rows] = self.counts
+        self.words, self.counts = words, counts
+
+    def scores(self, term_ids: Iterable[int]) -> np.ndarray:
+        """Cosine similarity of the query against every document."""
+        unique_ids = np.array(sorted(set(int(term_id) for term_id in term_ids)), dtype=np.int64)
+        query = np.zeros(max(self.words.shape[1], _n_words(unique_ids[-1] + 1 if len(unique_ids) else 0)),
+                         dtype=np.uint64)
+        np.bitwise_or.at(query, unique_ids >> 6, np.left_shift(np.uint64(1), (unique_ids & 63).astype(np.uint64)))
+
+        # Words the query leaves empty cannot intersect, so only AND the rest
+        columns = np.flatnonzero(query[:self.words.shape[1]])
+        rows = self.words[:self._size]
+        overlap = popcount(rows[:, columns] & query[columns]).astype(np.float64)
+
+        norms = np.sqrt(self.counts[:self._size].astype(np.float64)) * np.sqrt(float(len(unique_ids)))
+        return overlap / np.maximum(norms, 1e-8)
+
+    def search(self, term_ids: Iterable[int], n_results: int = 5,
+               exclude: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """Return up to ``n_results`` (document, cosine similarity) pairs, best first.
+
+        ``exclude`` is an optional boolean mask of documents to leave out.
+        """
+        if n_results <= 0 or not self._size:
+            return []
+        scores = self.scores(term_ids)
+        if exclude is not None:
+            scores[exclude[:self._size]] = 0
+        candidates = np.flatnonzero(scores > 0)
+        top = candidates[_top_candidates(scores[candidates], n_results)]
+
+        return heapq.nsmallest(
+            n_results,
+            ((int(doc), float(scores[doc])) for doc in top),
+            key=lambda item: (-item[1], item[0])
+        )
+
+
+def _n_words(n_terms: int) -> int:
+    return (n_terms + 63) // 64
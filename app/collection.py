@@ -0,0 +1,308 @@
+from typing import Any, Dict, Iterable, List, Optional, Set
+import os
+import threading
+import joblib
+from .inverted_index import InvertedIndex
+from .record_store import RecordStore
+
+
+class Collection:
+    """Id-keyed document collection with a term index and a metadata index.
+
+    Records are stored by position in the vector store's RecordStore under
+    the kind ``<name>_collection``, so adding or deleting writes only the
+    affected rows, in one transaction. Each record keeps its terms, so
+    loading rebuilds the term index without tokenizing. Adding an existing
+    id replaces its record; the old position is tombstoned and left as a
+    hole that queries skip and that is reclaimed once holes outnumber live
+    records. Metadata values are indexed so ``get(where=...)`` and
+    ``delete(where=...)`` look up positions directly instead of scanning
+    every record.
+
+    Another process (``scan_markdown.py --watch``) may be the writer, so
+    ``get`` and ``search`` first call ``refresh``, which reads only the
+    records and tombstones added since the last load and reloads everything
+    only after the writer has compacted the kind.
+    """
+
+    # Only compact once there are at least this many holes
+    MIN_COMPACT_HOLES = 64
+
+    def __init__(self, vector_store, name: str, storage: RecordStore):
+        self.vector_store = vector_store
+        self.name = name
+        self.kind = f"{name}_collection"
+        self.storage = storage
+        # Where earlier versions saved the whole collection
+        self.path = os.path.join(vector_store.persist_directory, f"{name}_collection.joblib")
+        self._lock = threading.RLock()
+        self._migrate_joblib()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def _load(self) -> None:
+        """Load the stored records and rebuild the term, id and metadata indexes."""
+        self.ids: List[Any] = []
+        self.documents: List[Optional[str]] = []
+        self.metadatas: List[Optional[Dict[str, Any]]] = []
+        self.vocabulary: Dict[str, int] = {}
+        self.index = InvertedIndex()
+        self._positions: Dict[Any, int] = {}
+        self._metadata_index: Dict[str, Dict[Any, Set[int]]] = {}
+        self._holes = 0
+        # Read before the records, so writes made while loading are picked up by the next refresh
+        self._data_version = self.storage.data_version()
+        self._generation = self.storage.generation(self.kind)
+        self._load_records(0, set(self.storage.tombstones(self.kind)))
+
+    def _load_records(self, start: int, holes: Set[int]) -> None:
+        """Append the stored records from position start; positions in holes become holes."""
+        for position, record in enumerate(self.storage.iter_records(self.kind, start), start):
+            if position in holes:
+                # Keep positions aligned with the store; holes have no terms
+                self.index.add([])
+                self.ids.append(None)
+                self.documents.append(None)
+                self.metadatas.append(None)
+                self._holes += 1
+                continue
+            self._append(record)
+
+    def refresh(self) -> None:
+        """Pick up records and tombstones written by another process since the last load."""
+        with self._lock:
+            data_version = self.storage.data_version()
+            if data_version == self._data_version:
+                return
+            if self.storage.generation(self.kind) != self._generation:
+                # The writer compacted the kind, so every position may have moved
+                self._load()
+                return
+            self._data_version = data_version
+            holes = set(self.storage.tombstones(self.kind))
+            for position in holes:
+                if position < len(self.ids) and self.ids[position] is not None:
+                    self._remove(position)
+            self._load_records(len(self.ids), holes)
+
+    def _migrate_joblib(self) -> None:
+        """Move a collection saved whole by earlier versions into the record store.
+
+        Runs when the store has no records of this kind yet, without keeping
+        the kind's writer lock. The file is kept with a .migrated suffix.
+        """
+        if not os.path.exists(self.path) or self.storage.count(self.kind):
+            return
+        saved = joblib.load(self.path)
+        terms = sorted(saved['vocabulary'], key=saved['vocabulary'].get)
+        indptr, term_ids = saved['index'].rows(0)
+        with self.storage.writing(self.kind):
+            self.storage.add(self.kind, 0, [
+                {
+                    'id': record_id,
+                    'document': saved['documents'][position],
+                    'metadata': saved['metadatas'][position],
+                    'terms': [terms[term_id] for term_id in term_ids[indptr[position]:indptr[position + 1]]]
+                }
+                for position, record_id in enumerate(saved['ids'])
+                if record_id is not None
+            ])
+        os.replace(self.path, f"{self.path}.migrated")
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        """Add a stored record to the in-memory indexes at the next position."""
+        row, _ = self.vector_store._extend_vocabulary(record['terms'], self.vocabulary)
+        position = self.index.add(row)
+        self.ids.append(record['id'])
+        self.documents.append(record['document'])
+        self.metadatas.append(record['metadata'])
+        self._positions[record['id']] = position
+        self._index_metadata(position, record['metadata'])
+
+    def add(self, documents: List[str], metadatas: List[Dict[str, Any]], ids: List[Any]) -> None:
+        """Add or replace many documents, tokenizing them in one batch and storing them in one transaction."""
+        if not (len(documents) == len(metadatas) == len(ids)):
+            raise ValueError("documents, metadatas and ids must have the same length")
+        if not ids:
+            return
+
+        token_lists = self.vector_store._preprocess_batch(list(documents))
+        records = [
+            {'id': record_id, 'document': document, 'metadata': metadata or {}, 'terms': sorted(set(tokens))}
+            for record_id, document, metadata, tokens in zip(ids, documents, metadatas, token_lists)
+        ]
+        with self._lock:
+            # Tombstone earlier records with the same ids, including earlier ones in this batch
+            first_position = len(self.ids)
+            positions = {}
+            replaced = []
+            for offset, record_id in enumerate(ids):
+                position = positions.get(record_id, self._positions.get(record_id))
+                if position is not None:
+                    replaced.append(position)
+                positions[record_id] = first_position + offset
+            self.storage.add(self.kind, first_position, records, tombstones=replaced)
+
+            for record in records:
+                if record['id'] in self._positions:
+                    self._remove(self._positions[record['id']])
+                self._append(record)
+            self._compact_if_needed()
+
+    upsert = add
+
+    def get(self, ids: Iterable[Any] = None, where: Dict[str, Any] = None,
+            limit: int = None) -> Dict[str, List]:
+        """Return records matching the given ids and metadata filter, in insertion order."""
+        self.refresh()
+        with self._lock:
+            positions = sorted(self._select(ids, where))
+            if limit is not None:
+                positions = positions[:limit]
+            return {
+                'ids': [self.ids[position] for position in positions],
+                'documents': [self.documents[position] for position in positions],
+                'metadatas': [self.metadatas[position] for position in positions]
+            }
+
+    def delete(self, ids: Iterable[Any] = None, where: Dict[str, Any] = None) -> int:
+        """Delete records matching the given ids and metadata filter.
+
+        Returns the number of records deleted.
+        """
+        if ids is None and where is None:
+            raise ValueError("delete needs ids or where")
+        with self._lock:
+            positions = self._select(ids, where)
+            if positions:
+                self.storage.remove(self.kind, positions)
+                for position in positions:
+                    self._remove(position)
+                self._compact_if_needed()
+            return len(positions)
+
+    def query(self, query_text: str, n_results: int = 5) -> List[Dict[str, Any]]:
+        """Find the documents most similar to a query."""
+        return self.search(self.vector_store._preprocess_text(query_text), n_results)
+
+    def search(self, tokens: List[str], n_results: int = 5) -> List[Dict[str, Any]]:
+        """Find the documents most similar to an already preprocessed query."""
+        self.refresh()
+        with self._lock:
+            if not self._positions:
+                return []
+            term_ids = self.vector_store._tokens_to_term_ids(tokens, self.vocabulary)
+            # Ask for extra results to make up for holes left by replaced records
+            matches = self.index.search(term_ids, n_results + self._holes)
+            return [
+                {
+                    'id': self.ids[position],
+                    'document': self.documents[position],
+                    'metadata': self.metadatas[position],
+                    'similarity': similarity
+                }
+                for position, similarity in matches
+                if self.ids[position] is not None and similarity > 0
+            ][:n_results]
+
+    def _select(self, ids: Optional[Iterable[Any]], where: Optional[Dict[str, Any]]) -> Set[int]:
+        """Positions of live records matching both ids and where."""
+        if ids is None:
+            positions = set(self._positions.values())
+        else:
+            positions = {self._positions[record_id] for record_id in ids if record_id in self._positions}
+
+        for key, condition in (where or {}).items():
+            if not positions:
+                break
+            positions &= self._match(key, condition)
+        return positions
+
+    def _match(self, key: str, condition: Any) -> Set[int]:
+        """Positions whose metadata[key] satisfies a where condition."""
+        if isinstance(condition, dict):
+            if set(condition) == {'$eq'}:
+                values = [condition['$eq']]
+            elif set(condition) == {'$in'}:
+                values = condition['$in']
+            else:
+                raise ValueError(f"Unsupported where condition for '{key}': {condition}")
+        else:
+            values = [condition]
+
+        by_value = self._metadata_index.get(key, {})
+        matched = set()
+        for value in values:
+            matched |= by_value.get(value, set())
+        return matched
+
+    def _remove(self, position: int) -> None:
+        """Turn a live record into a hole."""
+        self._unindex_metadata(position, self.metadatas[position])
+        del self._positions[self.ids[position]]
+        self.ids[position] = None
+        self.documents[position] = None
+        self.metadatas[position] = None
+        self._holes += 1
+
+    def _compact_if_needed(self) -> None:
+        """Drop holes, in memory and in the store, once they outnumber live records."""
+        if self._holes < self.MIN_COMPACT_HOLES or self._holes <= len(self._positions):
+            return
+
+        keep = [position for position, record_id in enumerate(self.ids) if record_id is not None]
+        index = self.index.subset(keep)
+        terms = sorted(self.vocabulary, key=self.vocabulary.get)
+        indptr, term_ids = index.rows(0)
+        self.storage.replace(self.kind, (
+            {
+                'id': self.ids[position],
+                'document': self.documents[position],
+                'metadata': self.metadatas[position],
+                'terms': [terms[term_id] for term_id in term_ids[indptr[offset]:indptr[offset + 1]]]
+            }
+            for offset, position in enumerate(keep)
+        ))
+        self.storage.compact()
+        self._generation = self.storage.generation(self.kind)
+
+        self.index = index
+        self.ids = [self.ids[position] for position in keep]
+        self.documents = [self.documents[position] for position in keep]
+        self.metadatas = [self.metadatas[position] for position in keep]
+        self._positions = {record_id: position for position, record_id in enumerate(self.ids)}
+        self._metadata_index = {}
+        for position, metadata in enumerate(self.metadatas):
+            self._index_metadata(position, metadata)
+        self._holes = 0
+
+    def _index_metadata(self, position: int, metadata: Dict[str, Any]) -> None:
+        for key, value in metadata.items():
+            by_value = self._metadata_index.setdefault(key, {})
+            for item in _indexable_values(value):
+                by_value.setdefault(item, set()).add(position)
+
+    def _unindex_metadata(self, position: int, metadata: Dict[str, Any]) -> None:
+        for key, value in metadata.items():
+            by_value = self._metadata_index.get(key, {})
+            for item in _indexable_values(value):
+                positions = by_value.get(item)
+                if positions is not None:
+                    positions.discard(position)
+                    if not positions:
+                        del by_value[item]
+
+
+def _indexable_values(value: Any) -> List[Any]:
+    """Values a metadata field is indexed under; list fields match any of their items."""
+    items = value if isinstance(value, (list, tuple, set)) else [value]
+    indexable = []
+    for item in items:
+        try:
+            hash(item)
+        except TypeError:
+            continue
+        indexable.append(item)
+    return indexable
@@ -0,0 +1,203 @@
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.orm import Session, selectinload
+from app import db
+from app.models import Task, TaskIndexQueue
+from app.record_store import claim_writer
+
+
+class TaskIndexer:
+    """Background worker that keeps the vector store in sync with the Task table.
+
+    Committed sessions enqueue the ids of tasks they created, changed or
+    deleted. The worker waits ``delay`` seconds so bursts of commits
+    coalesce, then loads the current rows of up to ``batch_size`` ids in one
+    query and applies them with a single ``VectorStore.sync_tasks`` call;
+    ids with no row left are removed from the index.
+
+    Only one process runs the indexer. Other app workers queue the ids they
+    change in the ``task_index_queue`` table, which the indexer drains every
+    ``poll_interval`` seconds.
+    """
+
+    def __init__(self, app, get_vector_store: Callable[[], Any], batch_size: int = 200, delay: float = 0.2,
+                 poll_interval: float = 1.0):
+        self.app = app
+        self.get_vector_store = get_vector_store
+        self.batch_size = batch_size
+        self.delay = delay
+        self.poll_interval = poll_interval
+        self._pending = set()
+        self._in_flight = False
+        self._stopping = False
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name='task-indexer', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Finish the queued work and stop the worker."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def enqueue(self, task_ids: Iterable[int]) -> None:
+        with self._condition:
+            self._pending.update(task_ids)
+            self._condition.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything enqueued so far is indexed; False on timeout."""
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending and not self._in_flight, timeout)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._stopping, self.poll_interval)
+                stopping = self._stopping
+            self._take_queued()
+            with self._condition:
+                if not self._pending:
+                    if stopping:
+                        return
+                    continue
+            if not stopping:
+                time.sleep(self.delay)
+
+            with self._condition:
+                task_ids = [self._pending.pop() for _ in range(min(self.batch_size, len(self._pending)))]
+                self._in_flight = True
+            try:
+                self._apply(task_ids)
+            except Exception as e:
+                # The reconciliation command repairs anything missed here
+                print(f"Error indexing tasks {task_ids}: {str(e)}")
+            finally:
+                with self._condition:
+                    self._in_flight = False
+                    self._condition.notify_all()
+
+    def _take_queued(self) -> None:
+        """Move task ids queued by other app workers into the pending set."""
+        try:
+            with self.app.app_context():
+                rows = (db.session.query(TaskIndexQueue.id, TaskIndexQueue.task_id)
+                        .order_by(TaskIndexQueue.id).limit(self.batch_size).all())
+                if not rows:
+                    return
+                db.session.query(TaskIndexQueue).filter(
+                    TaskIndexQueue.id.in_([row_id for row_id, _ in rows])
+                ).delete(synchronize_session=False)
+                db.session.commit()
+        except Exception as e:
+            print(f"Error reading the task index queue: {str(e)}")
+            return
+        self.enqueue(task_id for _, task_id in rows)
+
+    def _apply(self, task_ids: List[int]) -> None:
+        with self.app.app_context():
+            tasks = [
+                task_document(task)
+                for task in Task.query.options(selectinload(Task.tags)).filter(Task.id.in_(task_ids))
+            ]
+        found = {task['id'] for task in tasks}
+        self.get_vector_store().sync_tasks(tasks, [task_id for task_id in task_ids if task_id not in found])
+
+
+task_indexer: Optional[TaskIndexer] = None
+# Whether some process runs the indexer, so workers without one queue their changes for it
+queue_changes = False
+
+
+def start_indexer(app, get_vector_store: Callable[[], Any], store_file: str, batch_size: int = 200,
+                  delay: float = 0.2, poll_interval: float = 1.0) -> Optional[TaskIndexer]:
+    """Start the shared indexer, replacing one started by an earlier app.
+
+    The indexer writes tasks to the vector store, so it only starts in the
+    process that becomes the store's task writer. Returns None in the other
+    app workers, which queue their changes instead.
+    """
+    global task_indexer, queue_changes
+    queue_changes = True
+    if task_indexer is not None:
+        task_indexer.stop()
+        task_indexer = None
+    if not claim_writer(store_file, 'task'):
+        print("Task indexer runs in another process; queueing task changes for it")
+        return None
+    task_indexer = TaskIndexer(app, get_vector_store, batch_size, delay, poll_interval)
+    task_indexer.start()
+    return task_indexer
+
+
+def task_document(task: Task) -> Dict[str, Any]:
+    """A Task row as a vector store task."""
+    return {
+        'id': task.id,
+        'content': task.content,
+        'metadata': {
+            # Lets retrieval recognise the task when the same text is sent again
+            'raw_input': task.raw_input,
+            'project': task.project,
+            'milestone': task.milestone,
+            'priority': task.priority,
+            'status': task.status,
+            'due_date': task.due_date.isoformat() if task.due_date else None,
+            'tags': [tag.name for tag in task.tags]
+        }
+    }
+
+
+def iter_task_batches(batch_size: int = 500) -> Iterator[List[Dict[str, Any]]]:
+    """Stream every task in id order, one query per batch. Needs an app context."""
+    last_id = 0
+    while True:
+        batch = (Task.query.options(selectinload(Task.tags))
+                 .filter(Task.id > last_id).order_by(Task.id).limit(batch_size).all())
+        if not batch:
+            return
+        last_id = batch[-1].id
+        documents = [task_document(task) for task in batch]
+        # Keep only one batch of rows in the session at a time
+        db.session.expunge_all()
+        yield documents
+
+
+def reconcile(vector_store, batch_size: int = 500) -> int:
+    """Rebuild the vector store's tasks from the database. Needs an app context."""
+    return vector_store.rebuild_tasks(iter_task_batches(batch_size))
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changed_tasks(session, flush_context):
+    changed = session.info.setdefault('changed_task_ids', set())
+    flushed = {
+        instance.id for instance in chain(session.new, session.dirty, session.deleted)
+        if isinstance(instance, Task) and instance.id is not None
+    }
+    changed.update(flushed)
+    if flushed and task_indexer is None and queue_changes:
+        # Committed or rolled back together with the task changes
+        session.connection().execute(
+            TaskIndexQueue.__table__.insert(), [{'task_id': task_id} for task_id in flushed]
+        )
+
+
+@event.listens_for(Session, 'after_commit')
+def _enqueue_changed_tasks(session):
+    changed = session.info.pop('changed_task_ids', None)
+    if changed and task_indexer is not None:
+        task_indexer.enqueue(changed)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changed_tasks(session):
+    session.info.pop('changed_task_ids', None)
@@ -0,0 +1,209 @@
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import heapq
+import os
+import numpy as np
+
+
+class InvertedIndex:
+    """Term -> postings index over binary term vectors.
+
+    Each document is stored as the set of term ids it contains. Because the
+    vectors are binary, the cosine similarity between a query and a document
+    is ``overlap / (sqrt(|doc|) * sqrt(|query|))``, so only documents that
+    share at least one term with the query ever need to be scored.
+
+    An index loaded with ``load`` keeps its saved postings in a read-only
+    memory map, shared between processes through the page cache; documents
+    added afterwards are held in memory on top of it.
+    """
+
+    def __init__(self):
+        self.postings: Dict[int, array] = {}
+        self.doc_lengths = array('q')
+        self._base_indptr = None
+        self._base_docs = None
+        self._base_lengths = np.zeros(0, dtype=np.int64)
+        self._norms = None
+
+    def __len__(self) -> int:
+        return len(self._base_lengths) + len(self.doc_lengths)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_norms'] = None
+        return state
+
+    def __setstate__(self, state):
+        # Indexes pickled before the memory-mapped base existed lack its fields
+        self.__init__()
+        self.__dict__.update(state)
+
+    @classmethod
+    def from_matrix(cls, vectors: np.ndarray) -> 'InvertedIndex':
+        """Build an index from a dense (documents x vocabulary) matrix."""
+        index = cls()
+        if vectors is None:
+            return index
+        for row in np.atleast_2d(vectors):
+            index.add(np.flatnonzero(row))
+        return index
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> Tuple['InvertedIndex', int]:
+        """Open an index written by ``save``; returns the index and its vocabulary size.
+
+        The file is one int64 array: a header of (documents, terms, postings),
+        then the per-term offsets, the per-document lengths and the postings.
+        """
+        data = np.load(path, mmap_mode='r' if mmap else None)
+        n_docs, n_terms, n_postings = (int(value) for value in data[:3])
+        start = 3
+        index = cls()
+        index._base_indptr = data[start:start + n_terms + 1]
+        start += n_terms + 1
+        index._base_lengths = data[start:start + n_docs]
+        start += n_docs
+        index._base_docs = data[start:start + n_postings]
+        return index, n_terms
+
+    def save(self, path: str, n_terms: int) -> None:
+        """Write the whole index in the ``load`` format, replacing path atomically."""
+        counts = np.zeros(n_terms, dtype=np.int64)
+        term_docs = {}
+        for term_id in self.terms():
+            docs = self._term_docs(term_id)
+            term_docs[term_id] = docs
+            counts[term_id] = len(docs)
+        indptr = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+
+        header = np.array([len(self), n_terms, indptr[-1]], dtype=np.int64)
+        docs = np.zeros(indptr[-1], dtype=np.int64)
+        for term_id, postings in term_docs.items():
+            docs[indptr[term_id]:indptr[term_id + 1]] = postings
+
+        tmp_path = f"{path}.tmp.npy"
+        np.save(tmp_path, np.concatenate([header, indptr, self.lengths(), docs]))
+        os.replace(tmp_path, path)
+
+    def add(self, term_ids: Iterable[int]) -> int:
+        """Add a document and return its position in the index."""
+        doc = len(self)
+        unique_ids = set(int(term_id) for term_id in term_ids)
+        for term_id in unique_ids:
+            postings = self.postings.get(term_id)
+            if postings is None:
+                postings = self.postings[term_id] = array('q')
+            postings.append(doc)
+        self.doc_lengths.append(len(unique_ids))
+        self._norms = None
+        return doc
+
+    def terms(self) -> List[int]:
+        """Ids of every term with at least one posting."""
+        terms = set(self.postings)
+        if self._base_indptr is not None:
+            terms.update(np.flatnonzero(np.diff(self._base_indptr)).tolist())
+        return sorted(terms)
+
+    def _term_docs(self, term_id: int) -> np.ndarray:
+        """Documents containing a term, in position order."""
+        parts = []
+        if self._base_indptr is not None and term_id < len(self._base_indptr) - 1:
+            parts.append(self._base_docs[self._base_indptr[term_id]:self._base_indptr[term_id + 1]])
+        postings = self.postings.get(term_id)
+        if postings is not None:
+            parts.append(np.frombuffer(postings, dtype=np.int64))
+        if not parts:
+            return np.zeros(0, dtype=np.int64)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def rows(self, start: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """Term ids of documents from ``start`` on, as CSR (offsets, term ids)."""
+        doc_parts, term_parts = [], []
+        for term_id in self.terms():
+            docs = self._term_docs(term_id)
+            docs = docs[np.searchsorted(docs, start):]
+            if len(docs):
+                doc_parts.append(docs)
+                term_parts.append(np.full(len(docs), term_id, dtype=np.int64))
+        if not doc_parts:
+            return np.zeros(len(self) - start + 1, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        docs = np.concatenate(doc_parts)
+        order = np.argsort(docs, kind='stable')
+        indptr = np.zeros(len(self) - start + 1, dtype=np.int64)
+        np.cumsum(np.bincount(docs - start, minlength=len(self) - start), out=indptr[1:])
+        return indptr, np.concatenate(term_parts)[order]
+
+    def lengths(self) -> np.ndarray:
+        """Number of terms in each document."""
+        added = np.frombuffer(self.doc_lengths, dtype=np.int64)
+        if not len(self._base_lengths):
+            return added
+        return np.concatenate([self._base_lengths, added])
+
+    def subset(self, positions: Sequence[int]) -> 'InvertedIndex':
+        """Return a new index holding only the given documents, renumbered in order."""
+        keep = np.asarray(positions, dtype=np.int64)
+        remap = np.full(len(self), -1, dtype=np.int64)
+        remap[keep] = np.arange(len(keep))
+
+        index = InvertedIndex()
+        index.doc_lengths = array('q', self.lengths()[keep].tobytes())
+        for term_id in self.terms():
+            mapped = remap[self._term_docs(term_id)]
+            mapped = mapped[mapped >= 0]
+            if len(mapped):
+                index.postings[term_id] = array('q', mapped.tobytes())
+        return index
+
+    def norms(self) -> np.ndarray:
+        """Per-document L2 norms, cached until the next mutation."""
+        if self._norms is None:
+            self._norms = np.sqrt(self.lengths().astype(np.float64))
+        return self._norms
+
+    def to_matrix(self, n_terms: int) -> np.ndarray:
+        """Expand the index back into a dense binary matrix."""
+        matrix = np.zeros((len(self), n_terms))
+        for term_id in self.terms():
+            matrix[self._term_docs(term_id), term_id] = 1
+        return matrix
+
+    def search(self, term_ids: Iterable[int], n_results: int = 5,
+               exclude: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """Return up to ``n_results`` (document, cosine similarity) pairs, best first.
+
+        ``exclude`` is an optional boolean mask of documents to leave out.
+        """
+        unique_ids = set(int(term_id) for term_id in term_ids)
+        query_terms = [docs for docs in (self._term_docs(term_id) for term_id in unique_ids) if len(docs)]
+        if not query_terms or n_results <= 0:
+            return []
+
+        # Count how many query terms each candidate document shares
+        candidates, overlap = np.unique(np.concatenate(query_terms), return_counts=True)
+        if exclude is not None:
+            keep = ~exclude[candidates]
+            candidates, overlap = candidates[keep], overlap[keep]
+        scores = overlap / (self.norms()[candidates] * np.sqrt(len(unique_ids)))
+
+        # Select the top N without sorting every candidate; keeping every
+        # candidate tied with the Nth score makes ties break by position
+        top = _top_candidates(scores, n_results)
+
+        return heapq.nsmallest(
+            n_results,
+            ((int(candidates[i]), float(scores[i])) for i in top),
+            key=lambda item: (-item[1], item[0])
+        )
+
+
+def _top_candidates(scores: np.ndarray, n_results: int) -> np.ndarray:
+    """Indices of the scores that can make the top N, including ties with the Nth."""
+    if len(scores) <= n_results:
+        return np.arange(len(scores))
+    kth = np.partition(scores, len(scores) - n_results)[len(scores) - n_results]
+    return np.flatnonzero(scores >= kth)
@@ -1,12 +1,187 @@
 import os
-from typing import List, Dict, Any
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Set, Tuple
+import hashlib
+import itertools
+import json
 import re
+import threading
+import time
 from datetime import datetime
 import frontmatter
 
+MARKDOWN_EXTENSIONS = ('.md', '.markdown')
+
+class MarkdownManifest:
+    """Record of indexed markdown files: path -> mtime, size and content hash.
+
+    Files that could not be parsed are recorded with an 'error' so they are
+    not retried until they change.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = {}
+        self.changed = False
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+
+    def paths_under(self, directory_path: str) -> List[str]:
+        prefix = os.path.join(directory_path, '')
+        return [path for path in self.entries if path.startswith(prefix)]
+
+    def set(self, path: str, entry: Dict[str, Any]) -> None:
+        if self.entries.get(path) != entry:
+            self.entries[path] = entry
+            self.changed = True
+
+    def remove(self, path: str) -> None:
+        if self.entries.pop(path, None) is not None:
+            self.changed = True
+
+    def save(self) -> None:
+        """Write the manifest atomically, if any entry changed since the last save."""
+        if not self.changed:
+            return
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f)
+        os.replace(temp_path, self.path)
+        self.changed = False
+
+def _file_hash(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+FIELD_PATTERNS = ('due_date', 'priority', 'project', 'milestone')
+
+
+class MarkdownExtractor:
+    """Single-pass, line-streaming extraction of headers, tasks, tags and mentions.
+
+    Produces the same results as the original whole-file, multi-pass parser
+    (kept in ``benchmarks/markdown_extractor.py``), but reads the file one
+    line at a time with precompiled patterns so memory does not grow with
+    file size.
+    """
+
+    def __init__(self, patterns: Dict[str, str]):
+        self.header = re.compile(patterns['header'])
+        self.task = re.compile(patterns['task'])
+        self.tag = re.compile(patterns['tag'])
+        self.mention = re.compile(patterns['mention'])
+        self.fields = {key: re.compile(patterns[key], re.IGNORECASE) for key in FIELD_PATTERNS}
+        self.field_keywords = {key: key.split('_')[0] for key in FIELD_PATTERNS}
+
+    def extract_file(self, file_path: str) -> Tuple[Dict[str, Any], Dict[str, List]]:
+        """Return (frontmatter, extracted) for a markdown file."""
+        with open(file_path, 'r', encoding='utf-8') as f:
+            lines = (line[:-1] if line.endswith('\n') else line for line in f)
+            metadata, lines = self._split_frontmatter(lines)
+            return metadata, self.extract_lines(lines)
+
+    def extract_lines(self, lines: Iterator[str]) -> Dict[str, List]:
+        """Extract headers, tasks, tags and mentions from content lines in one pass."""
+        headers, tasks, tags, mentions = [], [], [], []
+        current_section = None
+
+        for line in _trimmed(lines):
+            if '#' in line:
+                tags.extend(self.tag.findall(line))
+            if '@' in line:
+                mentions.extend(self.mention.findall(line))
+
+            first = line[0]
+            if first == '#':
+                header_match = self.header.match(line)
+                if header_match:
+                    current_section = header_match.group(1)
+                    headers.append(current_section)
+                    continue
+
+            if first == '-' or first == '*':
+                task_match = self.task.match(line)
+                if task_match:
+                    tasks.append(self._task(task_match, current_section))
+
+        return {'headers': headers, 'tasks': tasks, 'tags': tags, 'mentions': mentions}
+
+    def _task(self, task_match, section: Optional[str]) -> Dict[str, Any]:
+        task_content = task_match.group(2)
+        task = {
+            'content': task_content,
+            'status': 'completed' if task_match.group(1) == 'x' else 'pending',
+            'section': section
+        }
+        # Skip searches whose keyword is absent; only safe for ASCII, where
+        # lower() agrees with re.IGNORECASE
+        lowered = task_content.lower() if task_content.isascii() else None
+        for key in FIELD_PATTERNS:
+            if lowered is not None and self.field_keywords[key] not in lowered:
+                match = None
+            else:
+                match = self.fields[key].search(task_content)
+            task[key] = match.group(1) if match else None
+        task['tags'] = self.tag.findall(task_content) if '#' in task_content else []
+        task['mentions'] = self.mention.findall(task_content) if '@' in task_content else []
+        return task
+
+    def _split_frontmatter(self, lines: Iterator[str]) -> Tuple[Dict[str, Any], Iterator[str]]:
+        """Consume a leading frontmatter block, returning its metadata and the remaining lines."""
+        for line in lines:
+            if line.strip():
+                first = line.lstrip()
+                break
+        else:
+            return {}, iter(())
+
+        handler = frontmatter.detect_format(first, frontmatter.handlers)
+        if handler is None:
+            return {}, itertools.chain([first], lines)
+
+        block = [first]
+        for line in lines:
+            block.append(line)
+            if handler.FM_BOUNDARY.match(line):
+                metadata, _ = frontmatter.parse('\n'.join(block), handler=handler)
+                return metadata, lines
+
+        # frontmatter strips the file first, so trailing spaces can hide the closing delimiter
+        tail = [line for line in block[1:] if line.strip()]
+        if tail and handler.FM_BOUNDARY.match(tail[-1].rstrip()):
+            metadata, _ = frontmatter.parse('\n'.join(block), handler=handler)
+            return metadata, iter(())
+
+        # No closing delimiter: frontmatter treats the whole file as content
+        return {}, iter(block)
+
+
+def _trimmed(lines: Iterator[str]) -> Iterator[str]:
+    """Skip blank lines and strip the ends of the content like frontmatter does."""
+    previous = None
+    for line in lines:
+        if not line.strip():
+            continue
+        if previous is None:
+            line = line.lstrip()
+        else:
+            yield previous
+        previous = line
+    if previous is not None:
+        yield previous.rstrip()
+
+
 class MarkdownScanner:
-    def __init__(self, vector_store):
+    def __init__(self, vector_store, manifest_path: Optional[str] = None):
         self.vector_store = vector_store
+        if manifest_path is None and vector_store is not None:
+            manifest_path = os.path.join(vector_store.persist_directory, 'markdown_manifest.json')
+        self.manifest = MarkdownManifest(manifest_path) if manifest_path else None
+        self._scan_entries = {}
         # Patterns for extracting information from markdown
         self.patterns = {
             'task': r'[-*] \[([ x])\] (.*)',  # Matches - [ ] or - [x]
@@ -18,128 +193,277 @@ class MarkdownScanner:
             'project': r'project:?\s*([^\s,]+)',
             'milestone': r'milestone:?\s*([^\s,]+)'
         }
+        self.extractor = MarkdownExtractor(self.patterns)
+
+    def scan_markdown_directory(self, directory_path: str, workers: Optional[int] = None,
+                                chunk_size: int = 100, full: bool = False) -> Dict[str, int]:
+        """Scan a directory of markdown files and extract context.
+
+        Files whose size, mtime and content hash match the manifest are
+        skipped, modified files are re-indexed and files that disappeared are
+        removed from the store; ``full`` re-indexes everything. With
+        ``workers`` > 1 files are parsed across a process pool. Parsed files
+        are streamed back in order and stored ``chunk_size`` files at a time,
+        with one batched store call per chunk. Returns counts of indexed,
+        removed and unchanged files.
+        """
+        directory_path = os.path.abspath(directory_path)
+        file_paths, removed, unchanged = self._plan_scan(directory_path, full)
+        return self._apply_scan(file_paths, removed, unchanged, workers, chunk_size)
+
+    def scan_markdown_files(self, file_paths: Iterable[str], chunk_size: int = 100) -> Dict[str, int]:
+        """Re-index specific files, e.g. the ones a file watcher reported.
+
+        Changed files are re-indexed like in ``scan_markdown_directory`` and
+        paths that no longer exist are removed from the store. Returns counts
+        of indexed, removed and unchanged files.
+        """
+        to_index, removed = [], []
+        unchanged = 0
+        for file_path in dict.fromkeys(os.path.abspath(path) for path in file_paths):
+            status = self._check_file(file_path, False)
+            if status == 'index':
+                to_index.append(file_path)
+            elif status == 'unchanged':
+                unchanged += 1
+            elif not self.manifest or file_path in self.manifest.entries:
+                removed.append(file_path)
+        return self._apply_scan(to_index, removed, unchanged, None, chunk_size)
+
+    def _apply_scan(self, file_paths: List[str], removed: List[str], unchanged: int,
+                    workers: Optional[int], chunk_size: int) -> Dict[str, int]:
+        """Remove deleted files, index changed ones and save the manifest if it changed."""
+        if removed:
+            self._remove_markdown_files(removed)
+
+        if workers and workers > 1 and len(file_paths) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = executor.map(_parse_in_worker, file_paths, chunksize=max(1, chunk_size // workers))
+                indexed = self._store_in_chunks(results, chunk_size)
+        else:
+            results = (self._try_parse_markdown_file(file_path) for file_path in file_paths)
+            indexed = self._store_in_chunks(results, chunk_size)
+
+        if self.manifest:
+            self.manifest.save()
+        self._scan_entries = {}
+
+        return {'indexed': indexed, 'removed': len(removed), 'unchanged': unchanged}
+
+    def watch(self, directories: List[str], interval: float = 2.0, chunk_size: int = 100) -> None:
+        """Keep the index in sync with the directories until interrupted.
+
+        With watchdog installed, file system events name the files that
+        changed and only those are checked; events are collected for
+        ``interval`` seconds so a burst of saves is indexed together.
+        Without it the directories are polled every ``interval`` seconds,
+        which stats every file but only hashes and parses changed ones.
+        """
+        directories = [os.path.abspath(directory) for directory in directories]
+        try:
+            from watchdog.observers import Observer
+        except ImportError:
+            print("watchdog is not installed; polling for changes instead")
+            self._poll(directories, interval, chunk_size)
+            return
+
+        collector = _ChangeCollector()
+        observer = Observer()
+        for directory in directories:
+            observer.schedule(collector, directory, recursive=True)
+        observer.start()
+        try:
+            # Catch changes made between the initial scan and the observer starting
+            for directory in directories:
+                self._report(directory, self.scan_markdown_directory(directory, chunk_size=chunk_size))
+            while True:
+                time.sleep(interval)
+                file_paths, directory_paths = collector.drain()
+                for directory_path in directory_paths:
+                    # A directory was moved or deleted: check what was indexed under it and what is there now
+                    if self.manifest:
+                        file_paths.update(self.manifest.paths_under(directory_path))
+                    file_paths.update(self._iter_markdown_files(directory_path))
+                if file_paths:
+                    self._report(', '.join(directories), self.scan_markdown_files(file_paths, chunk_size))
+        finally:
+            observer.stop()
+            observer.join()
+
+    def _poll(self, directories: List[str], interval: float, chunk_size: int) -> None:
+        while True:
+            for directory in directories:
+                self._report(directory, self.scan_markdown_directory(directory, chunk_size=chunk_size))
+            time.sleep(interval)
+
+    def _report(self, directory: str, stats: Dict[str, int]) -> None:
+        if stats['indexed'] or stats['removed']:
+            print(f"{directory}: {stats['indexed']} indexed, {stats['removed']} removed")
+
+    def _plan_scan(self, directory_path: str, full: bool) -> Tuple[List[str], List[str], int]:
+        """Compare the tree with the manifest.
+
+        Returns the files to (re)index, the indexed files that no longer
+        exist, and the number of unchanged files.
+        """
+        to_index = []
+        unchanged = 0
+        seen = set()
+
+        for file_path in self._iter_markdown_files(directory_path):
+            seen.add(file_path)
+            status = self._check_file(file_path, full)
+            if status == 'index':
+                to_index.append(file_path)
+            elif status == 'unchanged':
+                unchanged += 1
+
+        removed = []
+        if self.manifest:
+            removed = [path for path in self.manifest.paths_under(directory_path) if path not in seen]
+
+        return to_index, removed, unchanged
+
+    def _check_file(self, file_path: str, full: bool) -> str:
+        """Compare one file with the manifest: 'index', 'unchanged' or 'missing'."""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return 'missing'
+        entry = {'mtime': stat.st_mtime, 'size': stat.st_size}
+        previous = self.manifest.entries.get(file_path) if self.manifest else None
+
+        if not full and previous and previous['mtime'] == entry['mtime'] and previous['size'] == entry['size']:
+            return 'unchanged'
 
-    def scan_markdown_directory(self, directory_path: str) -> None:
-        """Scan a directory of markdown files and extract context."""
+        if self.manifest:
+            try:
+                entry['sha256'] = _file_hash(file_path)
+            except OSError:
+                return 'missing'
+            # Touched but not edited: just refresh the recorded mtime
+            if not full and previous and previous.get('sha256') == entry['sha256']:
+                if 'error' in previous:
+                    entry['error'] = previous['error']
+                self.manifest.set(file_path, entry)
+                return 'unchanged'
+
+        self._scan_entries[file_path] = entry
+        return 'index'
+
+    def _remove_markdown_files(self, file_paths: List[str]) -> None:
+        """Remove files and their tasks from the store and the manifest."""
+        self.vector_store.projects_collection.delete(where={'path': {'$in': file_paths}})
+        self.vector_store.tasks_collection.delete(where={'file_path': {'$in': file_paths}})
+        if self.manifest:
+            for file_path in file_paths:
+                self.manifest.remove(file_path)
+
+    def _iter_markdown_files(self, directory_path: str) -> Iterator[str]:
+        """Yield the paths of all markdown files under a directory."""
         for root, _, files in os.walk(directory_path):
             for file in files:
-                if file.endswith(('.md', '.markdown')):
-                    file_path = os.path.join(root, file)
-                    try:
-                        self._process_markdown_file(file_path)
-                    except Exception as e:
-                        print(f"Error processing {file_path}: {str(e)}")
-
-    def _process_markdown_file(self, file_path: str) -> None:
-        """Process a single markdown file."""
+                if file.endswith(MARKDOWN_EXTENSIONS):
+                    yield os.path.join(root, file)
+
+    def _store_in_chunks(self, results: Iterator[Tuple[str, Dict[str, Any], str]], chunk_size: int) -> int:
+        """Store parsed files in batches, reporting files that failed to parse.
+
+        Returns the number of files stored.
+        """
+        stored = 0
+        chunk = []
+        for file_path, context, error in results:
+            if error:
+                print(f"Error processing {file_path}: {error}")
+                self._record_failure(file_path, error)
+                continue
+            chunk.append(context)
+            if len(chunk) >= chunk_size:
+                stored += self._store_chunk(chunk)
+                chunk = []
+        if chunk:
+            stored += self._store_chunk(chunk)
+        return stored
+
+    def _record_failure(self, file_path: str, error: str) -> None:
+        """Record a file that failed to parse so it is skipped until it changes."""
+        entry = self._scan_entries.get(file_path)
+        if not self.manifest or entry is None:
+            return
+        previous = self.manifest.entries.get(file_path)
+        if previous and 'error' not in previous:
+            # Drop what was indexed from the last version that parsed
+            self._remove_markdown_files([file_path])
+        self.manifest.set(file_path, dict(entry, error=error))
+
+    def _store_chunk(self, contexts: List[Dict[str, Any]]) -> int:
         try:
-            # Parse frontmatter and content
-            with open(file_path, 'r', encoding='utf-8') as f:
-                post = frontmatter.load(f)
-                
-            metadata = post.metadata
-            content = post.content
-
-            # Extract file context
-            context = {
-                'file_path': file_path,
-                'filename': os.path.basename(file_path),
-                'last_modified': datetime.fromtimestamp(os.path.getmtime(file_path)).isoformat(),
-                'frontmatter': metadata,
-                'headers': self._extract_headers(content),
-                'tasks': self._extract_tasks(content),
-                'tags': self._extract_tags(content),
-                'mentions': self._extract_mentions(content)
-            }
-
-            # Store in vector database with different sections
-            self._store_markdown_context(context)
+            # Drop what was indexed for modified files before re-adding them
+            if self.manifest:
+                modified = [context['file_path'] for context in contexts
+                            if context['file_path'] in self.manifest.entries]
+                if modified:
+                    self._remove_markdown_files(modified)
 
+            self._store_markdown_contexts(contexts)
         except Exception as e:
-            print(f"Error reading {file_path}: {str(e)}")
-
-    def _extract_headers(self, content: str) -> List[str]:
-        """Extract markdown headers."""
-        headers = []
-        for line in content.split('\n'):
-            match = re.match(self.patterns['header'], line)
-            if match:
-                headers.append(match.group(1))
-        return headers
-
-    def _extract_tasks(self, content: str) -> List[Dict[str, Any]]:
-        """Extract tasks and their metadata from markdown content."""
-        tasks = []
-        current_section = None
+            paths = ', '.join(context['file_path'] for context in contexts)
+            print(f"Error storing {paths}: {str(e)}")
+            return 0
 
-        for line in content.split('\n'):
-            # Track current section
-            header_match = re.match(self.patterns['header'], line)
-            if header_match:
-                current_section = header_match.group(1)
-                continue
+        if self.manifest:
+            for context in contexts:
+                entry = self._scan_entries.get(context['file_path'])
+                if entry:
+                    self.manifest.set(context['file_path'], entry)
+        return len(contexts)
 
-            # Extract tasks
-            task_match = re.match(self.patterns['task'], line)
-            if task_match:
-                status = 'completed' if task_match.group(1) == 'x' else 'pending'
-                task_content = task_match.group(2)
-                
-                task = {
-                    'content': task_content,
-                    'status': status,
-                    'section': current_section,
-                    'due_date': self._extract_pattern(task_content, 'due_date'),
-                    'priority': self._extract_pattern(task_content, 'priority'),
-                    'project': self._extract_pattern(task_content, 'project'),
-                    'milestone': self._extract_pattern(task_content, 'milestone'),
-                    'tags': self._extract_tags(task_content),
-                    'mentions': self._extract_mentions(task_content)
-                }
-                tasks.append(task)
-
-        return tasks
-
-    def _extract_tags(self, content: str) -> List[str]:
-        """Extract hashtags from content."""
-        return re.findall(self.patterns['tag'], content)
-
-    def _extract_mentions(self, content: str) -> List[str]:
-        """Extract @mentions from content."""
-        return re.findall(self.patterns['mention'], content)
-
-    def _extract_pattern(self, content: str, pattern_key: str) -> str:
-        """Extract a pattern from content."""
-        match = re.search(self.patterns[pattern_key], content, re.IGNORECASE)
-        return match.group(1) if match else None
-
-    def _store_markdown_context(self, context: Dict[str, Any]) -> None:
-        """Store markdown context in vector database."""
-        # Store file-level context
-        file_content = f"""
+    def _try_parse_markdown_file(self, file_path: str) -> Tuple[str, Optional[Dict[str, Any]], Optional[str]]:
+        """Parse a file, returning (path, context, error) instead of raising."""
+        try:
+            return file_path, self._parse_markdown_file(file_path), None
+        except Exception as e:
+            return file_path, None, str(e)
+
+    def _parse_markdown_file(self, file_path: str) -> Dict[str, Any]:
+        """Parse a single markdown file into its context dict in one streaming pass."""
+        metadata, extracted = self.extractor.extract_file(file_path)
+
+        # Extract file context
+        return {
+            'file_path': file_path,
+            'filename': os.path.basename(file_path),
+            'last_modified': datetime.fromtimestamp(os.path.getmtime(file_path)).isoformat(),
+            'frontmatter': metadata,
+            **extracted
+        }
+
+    def _store_markdown_contexts(self, contexts: List[Dict[str, Any]]) -> None:
+        """Store the context of many markdown files with one add per collection."""
+        file_documents, file_metadatas, file_ids = [], [], []
+        task_documents, task_metadatas, task_ids = [], [], []
+
+        for context in contexts:
+            # Store file-level context
+            file_documents.append(f"""
         File: {context['filename']}
         Headers: {' > '.join(context['headers'])}
         Tags: {', '.join(context['tags'])}
         Last Modified: {context['last_modified']}
-        """
-        
-        self.vector_store.projects_collection.add(
-            documents=[file_content],
-            metadatas=[{
+        """)
+            file_metadatas.append({
                 'type': 'markdown_file',
                 'path': context['file_path'],
                 'tags': context['tags'],
                 'headers': context['headers']
-            }],
-            ids=[f"md_{os.path.basename(context['file_path'])}"]
-        )
+            })
+            file_ids.append(f"md_{context['file_path']}")
 
-        # Store each task as a separate vector
-        for i, task in enumerate(context['tasks']):
-            task_id = f"md_task_{os.path.basename(context['file_path'])}_{i}"
-            self.vector_store.tasks_collection.add(
-                documents=[task['content']],
-                metadatas=[{
+            # Store each task as a separate vector
+            for i, task in enumerate(context['tasks']):
+                task_documents.append(task['content'])
+                task_metadatas.append({
                     'type': 'markdown_task',
                     'file_path': context['file_path'],
                     'section': task['section'],
@@ -150,6 +474,67 @@ class MarkdownScanner:
                     'milestone': task['milestone'],
                     'tags': task['tags'],
                     'mentions': task['mentions']
-                }],
-                ids=[task_id]
+                })
+                task_ids.append(f"md_task_{context['file_path']}_{i}")
+
+        if file_documents:
+            self.vector_store.projects_collection.add(
+                documents=file_documents,
+                metadatas=file_metadatas,
+                ids=file_ids
+            )
+        if task_documents:
+            self.vector_store.tasks_collection.add(
+                documents=task_documents,
+                metadatas=task_metadatas,
+                ids=task_ids
             )
+
+
+class _ChangeCollector:
+    """watchdog event handler that collects the paths of changed markdown files.
+
+    Directory events are kept separately, since moving or deleting a
+    directory is reported once for the directory and not for its files.
+    """
+
+    # Reads, including the scanner's own, are not changes
+    IGNORED_EVENTS = ('opened', 'closed_no_write')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._files: Set[str] = set()
+        self._directories: Set[str] = set()
+
+    def dispatch(self, event) -> None:
+        if event.event_type in self.IGNORED_EVENTS:
+            return
+        paths = [event.src_path, getattr(event, 'dest_path', '')]
+        with self._lock:
+            for path in paths:
+                if not path:
+                    continue
+                if event.is_directory:
+                    # Directory 'modified' events only repeat changes already reported for its files
+                    if event.event_type != 'modified':
+                        self._directories.add(path)
+                elif path.endswith(MARKDOWN_EXTENSIONS):
+                    self._files.add(path)
+
+    def drain(self) -> Tuple[Set[str], Set[str]]:
+        """Return and forget the changed file and directory paths."""
+        with self._lock:
+            files, directories = self._files, self._directories
+            self._files, self._directories = set(), set()
+        return files, directories
+
+
+_worker_scanner = None
+
+
+def _parse_in_worker(file_path: str) -> Tuple[str, Optional[Dict[str, Any]], Optional[str]]:
+    """Parse a markdown file in a pool worker, which holds no vector store."""
+    global _worker_scanner
+    if _worker_scanner is None:
+        _worker_scanner = MarkdownScanner(None)
+    return _worker_scanner._try_parse_markdown_file(file_path)
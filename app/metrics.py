@@ -0,0 +1,195 @@
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, Iterable, List, Optional, Tuple
+import threading
+import time
+
+# Seconds; covers sub-millisecond index lookups up to slow provider calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _Metric:
+    """A named family of values keyed by label values."""
+
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _label_text(self, key: Tuple[str, ...], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key, value) -> List[str]:
+        return [f"{self.name}{self._label_text(key)} {_number(value)}"]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                # One count per bucket plus +Inf, then the sum
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[bisect_left(self.buckets, value)] += 1
+            counts[-1] += value
+
+    def time(self, **labels) -> '_Timer':
+        """Context manager or decorator that observes the elapsed seconds."""
+        return _Timer(lambda seconds: self.observe(seconds, **labels))
+
+    def _render_value(self, key, counts) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else _number(bound)
+            lines.append(f"{self.name}_bucket{self._label_text(key, (('le', le),))} {cumulative}")
+        lines.append(f"{self.name}_sum{self._label_text(key)} {_number(counts[-1])}")
+        lines.append(f"{self.name}_count{self._label_text(key)} {cumulative}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, report):
+        self._report = report
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._report(time.perf_counter() - self._start)
+
+    def __call__(self, function):
+        @wraps(function)
+        def timed(*args, **kwargs):
+            with _Timer(self._report):
+                return function(*args, **kwargs)
+        return timed
+
+
+class Registry:
+    """The metrics exposed on /metrics, in registration order."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        return '\n'.join(line for metric in self._metrics for line in metric.render()) + '\n'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+REGISTRY = Registry()
+
+PROCESS_TASK_STAGE_SECONDS = REGISTRY.register(Histogram(
+    'promptodo_process_task_stage_seconds', 'Time spent in each stage of processing a task.',
+    ('stage', 'provider', 'model')))
+LLM_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'promptodo_llm_request_seconds', 'Provider calls, including rate-limit retries.', ('provider', 'model')))
+LLM_FAILURES = REGISTRY.register(Counter(
+    'promptodo_llm_failures_total', 'Failed provider calls by reason.', ('provider', 'model', 'reason')))
+JSON_FALLBACK_PARSES = REGISTRY.register(Counter(
+    'promptodo_llm_json_fallback_parses_total',
+    'Responses that were not plain JSON and had an object extracted from the text.', ('provider', 'model')))
+VECTOR_STORE_SECONDS = REGISTRY.register(Histogram(
+    'promptodo_vector_store_seconds', 'Vector store retrieval calls.', ('operation',)))
+REQUEST_STAGE_SECONDS = REGISTRY.register(Histogram(
+    'promptodo_request_stage_seconds', 'Time spent in each stage of a request handler.', ('endpoint', 'stage')))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'promptodo_http_request_seconds', 'Request latency.', ('endpoint', 'method', 'status')))
+INDEX_SIZE = REGISTRY.register(Gauge(
+    'promptodo_index_size', 'Size of the loaded vector store indexes.', ('index', 'unit')))
+
+# Stage timings of the request being handled, for the Server-Timing header
+_request_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar('request_stages', default=None)
+
+
+def start_request() -> None:
+    """Start collecting stage timings for the current request."""
+    _request_stages.set({})
+
+
+def finish_request() -> Dict[str, float]:
+    """Stop collecting and return the stage timings of the current request."""
+    stages = _request_stages.get() or {}
+    _request_stages.set(None)
+    return stages
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    """Add to a stage of the current request, if timings are being collected."""
+    stages = _request_stages.get()
+    if stages is not None:
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+
+def request_stage(endpoint: str, stage: str) -> _Timer:
+    """Time a stage of a request handler into its histogram and Server-Timing entry."""
+    def report(seconds):
+        REQUEST_STAGE_SECONDS.observe(seconds, endpoint=endpoint, stage=stage)
+        record_stage(stage, seconds)
+    return _Timer(report)
+
+
+def server_timing(stages: Dict[str, float]) -> str:
+    """Format stage timings as a Server-Timing header value, in milliseconds."""
+    return ', '.join(f"{stage.replace('.', '-')};dur={seconds * 1000:.1f}" for stage, seconds in stages.items())
@@ -0,0 +1,205 @@
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+import hashlib
+import heapq
+import os
+import numpy as np
+from .inverted_index import _top_candidates
+
+# Universal hashing (a * x + b) mod p over term ids
+_PRIME = (1 << 31) - 1
+
+
+class MinHashIndex:
+    """Approximate task search with MinHash signatures and LSH banding.
+
+    Each document's term set gets ``bands * rows`` MinHash values; documents
+    sharing all values of any band land in the same bucket as the query and
+    become candidates, which are then scored exactly with the same cosine
+    as the inverted index. More bands or fewer rows per band raise recall
+    at the cost of more candidates to re-rank.
+    """
+
+    def __init__(self, bands: int = 16, rows: int = 4, seed: int = 1):
+        self.bands = bands
+        self.rows = rows
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, size=bands * rows, dtype=np.int64)
+        self._b = rng.integers(0, _PRIME, size=bands * rows, dtype=np.int64)
+        self._mix = rng.integers(1, 1 << 63, size=rows, dtype=np.uint64) | np.uint64(1)
+
+        self.signatures = np.zeros((0, bands * rows), dtype=np.uint32)
+        self.band_keys = np.zeros((bands, 0), dtype=np.uint64)
+        self.indptr = array('q', [0])
+        self.terms = array('q')
+        self._size = 0
+        self._sorted_size = 0
+        self._sorted_keys = np.zeros((bands, 0), dtype=np.uint64)
+        self._sorted_docs = np.zeros((bands, 0), dtype=np.int64)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, term_ids: Iterable[int]) -> int:
+        """Add a document and return its position."""
+        terms = sorted(set(int(term_id) for term_id in term_ids))
+        self.add_rows(np.array([0, len(terms)]), np.array(terms, dtype=np.int64))
+        return self._size - 1
+
+    def add_rows(self, indptr: np.ndarray, terms: np.ndarray) -> None:
+        """Add documents given as CSR rows (offsets into a flat term id array)."""
+        n_docs = len(indptr) - 1
+        if n_docs <= 0:
+            return
+        signatures = self._signatures(np.asarray(indptr, dtype=np.int64), np.asarray(terms, dtype=np.int64))
+
+        start = self._size
+        self._reserve(start + n_docs)
+        self.signatures[start:start + n_docs] = signatures
+        self.band_keys[:, start:start + n_docs] = self._band_keys(signatures)
+        offset = self.indptr[-1]
+        self.indptr.extend((np.asarray(indptr[1:], dtype=np.int64) - indptr[0] + offset).tolist())
+        self.terms.extend(np.asarray(terms[indptr[0]:indptr[-1]], dtype=np.int64).tolist())
+        self._size += n_docs
+
+    def _reserve(self, n_docs: int) -> None:
+        capacity = len(self.signatures)
+        if n_docs <= capacity:
+            return
+        capacity = max(n_docs, capacity * 2, 16)
+        signatures = np.zeros((capacity, self.bands * self.rows), dtype=np.uint32)
+        signatures[:self._size] = self.signatures[:self._size]
+        band_keys = np.zeros((self.bands, capacity), dtype=np.uint64)
+        band_keys[:, :self._size] = self.band_keys[:, :self._size]
+        self.signatures, self.band_keys = signatures, band_keys
+
+    def _signatures(self, indptr: np.ndarray, terms: np.ndarray) -> np.ndarray:
+        """MinHash signatures for CSR rows, computed in chunks to bound memory."""
+        n_docs = len(indptr) - 1
+        signatures = np.full((n_docs, self.bands * self.rows), _PRIME, dtype=np.uint32)
+        nonempty = np.flatnonzero(np.diff(indptr) > 0)
+        chunk = max(1, (1 << 21) // (self.bands * self.rows))
+        for first in range(0, len(nonempty), chunk):
+            docs = nonempty[first:first + chunk]
+            lo, hi = indptr[docs[0]], indptr[docs[-1] + 1]
+            hashes = (terms[lo:hi, None] * self._a + self._b) % _PRIME
+            # Starts of the non-empty rows within this slice
+            starts = indptr[docs] - lo
+            signatures[docs] = np.minimum.reduceat(hashes, starts, axis=0)
+        return signatures
+
+    def _band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """One 64-bit key per (band, document) from that band's MinHash values."""
+        banded = signatures.astype(np.uint64).reshape(len(signatures), self.bands, self.rows)
+        return (banded * self._mix).sum(axis=2, dtype=np.uint64).T
+
+    def _sort_buckets(self) -> None:
+        """Sort band keys so buckets are found with a binary search."""
+        keys = self.band_keys[:, :self._size]
+        order = np.argsort(keys, axis=1, kind='stable')
+        self._sorted_keys = np.take_along_axis(keys, order, axis=1)
+        self._sorted_docs = order
+        self._sorted_size = self._size
+
+    def candidates(self, term_ids: Iterable[int]) -> np.ndarray:
+        """Documents sharing at least one LSH bucket with the query."""
+        terms = np.array(sorted(set(int(term_id) for term_id in term_ids)), dtype=np.int64)
+        if not len(terms) or not self._size:
+            return np.zeros(0, dtype=np.int64)
+
+        # Re-sort once unsorted additions are more than a small fraction
+        if self._size - self._sorted_size > max(1024, self._sorted_size // 8):
+            self._sort_buckets()
+
+        query_keys = self._band_keys(self._signatures(np.array([0, len(terms)]), terms))[:, 0]
+        found = []
+        for band, key in enumerate(query_keys):
+            keys = self._sorted_keys[band]
+            lo, hi = np.searchsorted(keys, key, side='left'), np.searchsorted(keys, key, side='right')
+            found.append(self._sorted_docs[band, lo:hi])
+            tail = self.band_keys[band, self._sorted_size:self._size]
+            found.append(self._sorted_size + np.flatnonzero(tail == key))
+        return np.unique(np.concatenate(found))
+
+    def search(self, term_ids: Iterable[int], n_results: int = 5,
+               exclude: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """Return up to ``n_results`` (document, cosine similarity) pairs, best first.
+
+        Only LSH candidates are scored, but each candidate's score is exact.
+        ``exclude`` is an optional boolean mask of documents to leave out.
+        """
+        query = np.array(sorted(set(int(term_id) for term_id in term_ids)), dtype=np.int64)
+        candidates = self.candidates(query)
+        if exclude is not None:
+            candidates = candidates[~exclude[candidates]]
+        if n_results <= 0 or not len(candidates):
+            return []
+
+        # Gather the candidates' term ids and count the ones in the query
+        indptr = np.frombuffer(self.indptr, dtype=np.int64)
+        terms = np.frombuffer(self.terms, dtype=np.int64)
+        starts = indptr[candidates]
+        lengths = indptr[candidates + 1] - starts
+        owner = np.repeat(np.arange(len(candidates)), lengths)
+        positions = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        member = np.isin(terms[np.repeat(starts, lengths) + positions], query)
+        overlap = np.bincount(owner, weights=member, minlength=len(candidates))
+
+        scores = overlap / (np.sqrt(lengths.astype(np.float64)) * np.sqrt(len(query)))
+        keep = scores > 0
+        candidates, scores = candidates[keep], scores[keep]
+        top = _top_candidates(scores, n_results)
+        return heapq.nsmallest(
+            n_results,
+            ((int(candidates[i]), float(scores[i])) for i in top),
+            key=lambda item: (-item[1], item[0])
+        )
+
+    def save(self, path: str, vocabulary: Dict[str, int]) -> None:
+        """Persist signatures and rows, tagged with the vocabulary they refer to."""
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            params=np.array([self.bands, self.rows, self.seed, len(vocabulary)], dtype=np.int64),
+            vocabulary_digest=np.array(_vocabulary_digest(vocabulary, len(vocabulary))),
+            signatures=self.signatures[:self._size],
+            indptr=np.frombuffer(self.indptr, dtype=np.int64),
+            terms=np.frombuffer(self.terms, dtype=np.int64)
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, bands: int, rows: int, vocabulary: Dict[str, int],
+             seed: int = 1) -> Optional['MinHashIndex']:
+        """Load a saved index, or None if it is missing or was built differently.
+
+        Term ids only stay valid while the vocabulary grows by appending, so
+        the saved vocabulary must be a prefix of the current one.
+        """
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as saved:
+            saved_bands, saved_rows, saved_seed, vocabulary_size = saved['params'].tolist()
+            if (saved_bands, saved_rows, saved_seed) != (bands, rows, seed):
+                return None
+            if vocabulary_size > len(vocabulary) or \
+                    str(saved['vocabulary_digest']) != _vocabulary_digest(vocabulary, vocabulary_size):
+                return None
+
+            index = cls(bands, rows, seed)
+            signatures = saved['signatures']
+            index._reserve(len(signatures))
+            index.signatures[:len(signatures)] = signatures
+            index.band_keys[:, :len(signatures)] = index._band_keys(signatures)
+            index.indptr = array('q', saved['indptr'].tobytes())
+            index.terms = array('q', saved['terms'].tobytes())
+            index._size = len(signatures)
+        index._sort_buckets()
+        return index
+
+
+def _vocabulary_digest(vocabulary: Dict[str, int], size: int) -> str:
+    """Fingerprint of the first ``size`` vocabulary terms in id order."""
+    terms = sorted((term_id, term) for term, term_id in vocabulary.items() if term_id < size)
+    return hashlib.sha1('\n'.join(term for _, term in terms).encode('utf-8')).hexdigest()
@@ -2,14 +2,18 @@ from datetime import datetime
 from app import db
 
 # Association tables for many-to-many relationships
+# The primary keys cover lookups by task; the extra indexes cover the
+# reverse lookups (tasks for a tag, tasks assigned to a user).
 task_tags = db.Table('task_tags',
     db.Column('task_id', db.Integer, db.ForeignKey('task.id'), primary_key=True),
-    db.Column('tag_id', db.Integer, db.ForeignKey('tag.id'), primary_key=True)
+    db.Column('tag_id', db.Integer, db.ForeignKey('tag.id'), primary_key=True),
+    db.Index('ix_task_tags_tag_id_task_id', 'tag_id', 'task_id')
 )
 
 task_assignments = db.Table('task_assignments',
     db.Column('task_id', db.Integer, db.ForeignKey('task.id'), primary_key=True),
-    db.Column('user_id', db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    db.Column('user_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
+    db.Index('ix_task_assignments_user_id_task_id', 'user_id', 'task_id')
 )
 
 class User(db.Model):
@@ -22,6 +26,16 @@ class User(db.Model):
         return f'<User {self.username}>'
 
 class Task(db.Model):
+    __table_args__ = (
+        # Task list: newest first, optionally filtered by status (keyset on created_at, id)
+        db.Index('ix_task_created_at_id', 'created_at', 'id'),
+        db.Index('ix_task_status_created_at_id', 'status', 'created_at', 'id'),
+        # A user's open tasks ordered by due date
+        db.Index('ix_task_user_id_status_due_date', 'user_id', 'status', 'due_date'),
+        # Due-date ranges; the case-insensitive project index follows the class
+        db.Index('ix_task_due_date', 'due_date'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)
     raw_input = db.Column(db.Text, nullable=False)
@@ -57,9 +71,17 @@ class Task(db.Model):
             'tags': [tag.name for tag in self.tags]
         }
 
+# Project views match project names case-insensitively
+db.Index('ix_task_lower_project_status', db.func.lower(Task.project), Task.status)
+
 class Tag(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), unique=True, nullable=False)
 
     def __repr__(self):
         return f'<Tag {self.name}>'
+
+class TaskIndexQueue(db.Model):
+    """Ids of tasks changed in app workers that do not run the indexer, waiting for the one that does."""
+    id = db.Column(db.Integer, primary_key=True)
+    task_id = db.Column(db.Integer, nullable=False)
@@ -1,51 +1,116 @@
 import toml
 from datetime import datetime
 from dateutil import parser
-import anthropic
-import openai
-from groq import Groq
 from .vector_store import VectorStore
+from .response_cache import ResponseCache
+from . import metrics
+from concurrent.futures import ThreadPoolExecutor
 import json
+import logging
+import random
 import re
+import time
+
+logger = logging.getLogger(__name__)
 
 class NLPProcessor:
     def __init__(self):
         self.config = toml.load('config.toml')
         self.provider = self.config['llm']['provider']
         self._setup_client()
-        self.vector_store = VectorStore()
+        self.last_timings = {}
+        self.batch_config = self.config.get('batch', {})
+        self._setup_cache()
+        self.vector_store = VectorStore.from_config(self.config)
 
     def _setup_client(self):
+        # SDKs are imported on demand so only the configured one is loaded
+        self.rate_limit_errors = ()
+        self.model = None
         if self.provider == 'anthropic':
+            import anthropic
             self.client = anthropic.Anthropic(
                 api_key=self.config['anthropic']['api_key']
             )
             self.model = self.config['anthropic']['model']
+            self.rate_limit_errors = (anthropic.RateLimitError,)
         elif self.provider == 'openai':
+            import openai
             self.client = openai.OpenAI(
                 api_key=self.config['openai']['api_key'],
                 base_url=self.config['openai']['base_url']
             )
             self.model = self.config['openai']['model']
+            self.rate_limit_errors = (openai.RateLimitError,)
         elif self.provider == 'groq':
-            self.client = Groq(
+            import groq
+            self.client = groq.Groq(
                 api_key=self.config['groq']['api_key'],
                 base_url=self.config['groq']['base_url']
             )
             self.model = self.config['groq']['model']
+            self.rate_limit_errors = (groq.RateLimitError,)
+
+    def warm(self):
+        """Load the vector store now instead of on the first request."""
+        self.vector_store.load()
+
+    def _setup_cache(self):
+        cache_config = self.config.get('cache', {})
+        self.cache = None
+        if cache_config.get('enabled', True):
+            self.cache = ResponseCache(
+                path=cache_config.get('path', 'vector_db/llm_cache.sqlite'),
+                max_entries=cache_config.get('max_entries', 1000),
+                max_disk_entries=cache_config.get('max_disk_entries', 10000),
+                ttl_seconds=cache_config.get('ttl_seconds', 86400)
+            )
+
+    def cache_stats(self):
+        """Hit/miss statistics of the LLM response cache."""
+        return self.cache.stats() if self.cache else {'enabled': False}
 
     def process_task(self, text):
         """Process natural language task input and extract structured information."""
-        # Get similar tasks and project context
-        similar_tasks = self.vector_store.find_similar_tasks(text)
-        suggested_tags = self.vector_store.suggest_tags_from_context(text)
+        try:
+            return self._process_task(text)
+        except Exception as e:
+            print(f"Error processing task: {str(e)}")
+            return None
+
+    def process_tasks(self, texts):
+        """Process many task descriptions concurrently.
+
+        LLM calls are fanned out over a thread pool limited by
+        [batch] max_concurrency. Returns one (parsed, error) tuple per text,
+        in input order; exactly one of the two is None.
+        """
+        def process(text):
+            try:
+                return self._process_task(text), None
+            except Exception as e:
+                print(f"Error processing task: {str(e)}")
+                return None, str(e)
+
+        max_workers = max(1, min(self.batch_config.get('max_concurrency', 4), len(texts)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(process, texts))
+
+    def _process_task(self, text):
+        """Process a single task, raising on any failure."""
+        # Get similar tasks and project context in a single retrieval pass
+        retrieval = self.vector_store.retrieve_context(text)
+        similar_tasks = retrieval['similar_tasks']
+        suggested_tags = retrieval['suggested_tags']
+        timings = {f"retrieval.{stage}": seconds for stage, seconds in retrieval['timings'].items()}
         
         # Create context-aware prompt
+        start = time.perf_counter()
         context = ""
         if similar_tasks:
             context += "\nSimilar tasks in the system:"
             for task in similar_tasks[:3]:
-                context += f"\n- {task['metadata'].get('content', '')}"
+                context += f"\n- {task.get('content') or task['metadata'].get('content', '')}"
         
         if suggested_tags:
             context += f"\nSuggested tags based on project context: {', '.join(suggested_tags)}"
@@ -71,76 +136,128 @@ class NLPProcessor:
         
         Respond ONLY with the JSON object, no additional text.
         """
+        timings['prompt'] = time.perf_counter() - start
 
+        start = time.perf_counter()
+        cache_key = None
+        cached = None
+        if self.cache:
+            cache_key = ResponseCache.make_key(self.provider, self.model, text, context)
+            cached = self.cache.get(cache_key)
+
+        if cached is not None:
+            logger.info("process_task: LLM response served from cache")
+            result = cached
+        else:
+            result = self._call_llm_with_backoff(prompt)
+        timings['llm'] = time.perf_counter() - start
+
+        # Parse the result
+        start = time.perf_counter()
+        if not result:
+            metrics.LLM_FAILURES.inc(reason='empty', **self._metric_labels())
+            raise ValueError("No response from LLM provider")
+
+        # Process the result and convert dates
         try:
-            result = None
-            if self.provider == 'anthropic':
-                response = self.client.messages.create(
-                    model=self.model,
-                    max_tokens=1000,
-                    system="You are a task management assistant that extracts structured information from natural language task descriptions. Always respond with valid JSON.",
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ]
-                )
-                result = response.content[0].text
-            elif self.provider == 'openai':
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature=0
-                )
-                result = response.choices[0].message.content
-            elif self.provider == 'groq':
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature=0
-                )
-                result = response.choices[0].message.content
-
-            # Parse the result
-            try:
-                if not result:
-                    raise ValueError("No response from LLM provider")
+            parsed = json.loads(result)
+        except json.JSONDecodeError:
+            # Try to extract JSON from the response if it contains additional text
+            json_match = re.search(r'\{.*\}', result, re.DOTALL)
+            if json_match:
+                metrics.JSON_FALLBACK_PARSES.inc(**self._metric_labels())
+                parsed = json.loads(json_match.group(0))
+            else:
+                metrics.LLM_FAILURES.inc(reason='unparseable', **self._metric_labels())
+                raise ValueError("Could not parse JSON from response")
 
-                # Process the result and convert dates
-                try:
-                    parsed = json.loads(result)
-                except json.JSONDecodeError:
-                    # Try to extract JSON from the response if it contains additional text
-                    json_match = re.search(r'\{.*\}', result, re.DOTALL)
-                    if json_match:
-                        parsed = json.loads(json_match.group(0))
-                    else:
-                        raise ValueError("Could not parse JSON from response")
+        # Set default project to "Inbox" if not specified or empty
+        if not parsed.get('project'):
+            parsed['project'] = 'Inbox'
 
-                # Set default project to "Inbox" if not specified or empty
-                if not parsed.get('project'):
-                    parsed['project'] = 'Inbox'
+        # Parse the due date if present
+        if parsed.get('due_date'):
+            parsed['due_date'] = parser.parse(parsed['due_date'])
 
-                # Parse the due date if present
-                if parsed.get('due_date'):
-                    parsed['due_date'] = parser.parse(parsed['due_date'])
+        # Only cache responses that parsed cleanly
+        if cache_key and cached is None:
+            self.cache.set(cache_key, result)
 
-                return parsed
+        timings['parse'] = time.perf_counter() - start
+        self._report_timings(timings)
+        return parsed
 
-            except Exception as e:
-                print(f"Error processing task: {str(e)}")
-                return None
+    def _call_llm(self, prompt):
+        """Send the prompt to the configured provider and return the raw text."""
+        if self.provider == 'anthropic':
+            response = self.client.messages.create(
+                model=self.model,
+                max_tokens=1000,
+                system="You are a task management assistant that extracts structured information from natural language task descriptions. Always respond with valid JSON.",
+                messages=[
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ]
+            )
+            return response.content[0].text
+        elif self.provider in ('openai', 'groq'):
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0
+            )
+            return response.choices[0].message.content
+        return None
 
-        except Exception as e:
-            print(f"Error processing task: {str(e)}")
-            return None
+    def _call_llm_with_backoff(self, prompt):
+        """Call the provider, retrying rate-limited requests with exponential backoff."""
+        max_retries = self.batch_config.get('max_retries', 5)
+        backoff = self.batch_config.get('backoff_seconds', 1.0)
+        max_backoff = self.batch_config.get('max_backoff_seconds', 30.0)
+
+        labels = self._metric_labels()
+        with metrics.LLM_REQUEST_SECONDS.time(**labels):
+            for attempt in range(max_retries + 1):
+                try:
+                    return self._call_llm(prompt)
+                except self.rate_limit_errors:
+                    metrics.LLM_FAILURES.inc(reason='rate_limited', **labels)
+                    if attempt == max_retries:
+                        raise
+                    delay = min(max_backoff, backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+                    logger.warning("Rate limited by %s, retrying in %.1fs", self.provider, delay)
+                    time.sleep(delay)
+                except Exception:
+                    metrics.LLM_FAILURES.inc(reason='error', **labels)
+                    raise
+
+    def _metric_labels(self):
+        return {'provider': self.provider, 'model': self.model or ''}
+
+    def _report_timings(self, timings):
+        """Record and log how long each stage of process_task took."""
+        self.last_timings = timings
+        labels = self._metric_labels()
+        for stage, seconds in timings.items():
+            metrics.PROCESS_TASK_STAGE_SECONDS.observe(seconds, stage=stage, **labels)
+            metrics.record_stage(stage, seconds)
+        logger.info(
+            "process_task timings: %s",
+            ", ".join(f"{stage}={seconds * 1000:.1f}ms" for stage, seconds in timings.items())
+        )
 
     def validate_task(self, processed_task):
         """Validate the processed task and ensure all required fields are present."""
         required_fields = ['task_content']
         return all(field in processed_task for field in required_fields)
 
-    def scan_project(self, repo_path):
+    def scan_project(self, repo_path, full_history=False):
         """Scan a project repository to build context."""
-        self.vector_store.scan_git_project(repo_path)
+        git_config = self.config.get('git', {})
+        return self.vector_store.scan_git_project(
+            repo_path,
+            max_commits=git_config.get('max_commits', 100),
+            full_history=full_history or git_config.get('full_history', False)
+        )
@@ -0,0 +1,263 @@
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+import json
+import os
+import sqlite3
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # No advisory file locks (Windows): the single-writer rule is not enforced
+    fcntl = None
+
+
+class RecordStore:
+    """Append-mostly record storage for the vector store, backed by SQLite.
+
+    Tasks, project contexts and collection documents are rows keyed by
+    (kind, position), so adding
+    records writes only the new rows and each write is one transaction: a
+    crash leaves either the old or the new state, never a torn file. The
+    journal table holds index rows added since the last index snapshot and
+    is written in the same transaction as the records it belongs to.
+    Records are never deleted in place; removing one records a tombstone for
+    its position until the kind is rewritten by ``replace``, which also bumps
+    the kind's generation so readers in other processes know to reload it
+    rather than read on from their last position.
+
+    Each kind has a single writer. Writers append at the positions they
+    have loaded, so two processes writing the same kind would collide; the
+    first write of a kind takes an exclusive ``<path>.<kind>.lock`` for the
+    life of the process, and writes from any other process fail. One-off
+    writes, like migrations, hold it only for a ``writing`` block. A
+    collision that still happens fails its insert and rolls back instead of
+    overwriting rows.
+    """
+
+    # VACUUM once this fraction of the file is free pages
+    COMPACT_FREE_RATIO = 0.25
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._writer_kinds = set()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS records ("
+                "kind TEXT NOT NULL, position INTEGER NOT NULL, data TEXT NOT NULL, "
+                "PRIMARY KEY (kind, position))"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS journal ("
+                "position INTEGER PRIMARY KEY, terms TEXT NOT NULL, row TEXT NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS tombstones ("
+                "kind TEXT NOT NULL, position INTEGER NOT NULL, PRIMARY KEY (kind, position))"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS generations (kind TEXT PRIMARY KEY, generation INTEGER NOT NULL)"
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+            for kind in self._writer_kinds:
+                _release_writer_lock(self.path, kind)
+            self._writer_kinds.clear()
+
+    def _claim(self, kind: str) -> None:
+        """Become the writer of a kind, or raise if another process is."""
+        if kind not in self._writer_kinds:
+            _acquire_writer_lock(self.path, kind)
+            self._writer_kinds.add(kind)
+
+    @contextmanager
+    def writing(self, kind: str) -> Iterator[None]:
+        """Hold the writer lock of a kind just for the block, unless this store already writes it."""
+        held = kind in self._writer_kinds
+        self._claim(kind)
+        try:
+            yield
+        finally:
+            if not held:
+                self._writer_kinds.discard(kind)
+                _release_writer_lock(self.path, kind)
+
+    def count(self, kind: str) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM records WHERE kind = ?", (kind,)).fetchone()[0]
+
+    def data_version(self) -> int:
+        """A number that changes whenever another connection commits to the database."""
+        with self._lock:
+            return self._db.execute("PRAGMA data_version").fetchone()[0]
+
+    def generation(self, kind: str) -> int:
+        """How many times a kind has been rewritten by ``replace``."""
+        with self._lock:
+            row = self._db.execute("SELECT generation FROM generations WHERE kind = ?", (kind,)).fetchone()
+            return row[0] if row else 0
+
+    def _stream(self, sql: str, params: Tuple = ()) -> Iterator[Tuple]:
+        """Yield query rows in batches rather than fetching them all at once."""
+        cursor = self._db.cursor()
+        with self._lock:
+            cursor.execute(sql, params)
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(1000)
+            if not rows:
+                return
+            yield from rows
+
+    def iter_records(self, kind: str, start: int = 0) -> Iterator[Any]:
+        """Stream the records of one kind in position order, from position ``start``."""
+        for (data,) in self._stream(
+            "SELECT data FROM records WHERE kind = ? AND position >= ? ORDER BY position", (kind, start)
+        ):
+            yield json.loads(data)
+
+    def add(self, kind: str, first_position: int, items: List[Any],
+            journal: Iterable[Tuple[int, List[str], List[int]]] = (),
+            tombstones: Iterable[int] = ()) -> None:
+        """Store items at consecutive positions, plus their journal rows, in one transaction.
+
+        ``tombstones`` are positions of earlier records of the same kind to
+        mark removed in the same transaction.
+        """
+        self._claim(kind)
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO tombstones (kind, position) VALUES (?, ?)",
+                ((kind, position) for position in tombstones)
+            )
+            self._db.executemany(
+                "INSERT INTO records (kind, position, data) VALUES (?, ?, ?)",
+                ((kind, first_position + offset, json.dumps(item)) for offset, item in enumerate(items))
+            )
+            self._db.executemany(
+                "INSERT INTO journal (position, terms, row) VALUES (?, ?, ?)",
+                ((position, json.dumps(terms), json.dumps(row)) for position, terms, row in journal)
+            )
+
+    def remove(self, kind: str, positions: Iterable[int]) -> None:
+        """Tombstone records of a kind in one transaction."""
+        self._claim(kind)
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO tombstones (kind, position) VALUES (?, ?)",
+                ((kind, position) for position in positions)
+            )
+
+    def replace(self, kind: str, items: Iterable[Any], clear_journal: bool = False) -> int:
+        """Replace every record of a kind, streaming the new ones, in one transaction.
+
+        Tombstones of the kind are cleared too, since they describe the old
+        records, and so is the journal with ``clear_journal``.
+        Returns the number of records written.
+        """
+        self._claim(kind)
+        count = 0
+
+        def rows():
+            nonlocal count
+            for position, item in enumerate(items):
+                count += 1
+                yield kind, position, json.dumps(item)
+
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM records WHERE kind = ?", (kind,))
+            self._db.execute("DELETE FROM tombstones WHERE kind = ?", (kind,))
+            if clear_journal:
+                self._db.execute("DELETE FROM journal")
+            self._db.execute(
+                "INSERT INTO generations (kind, generation) VALUES (?, 1) "
+                "ON CONFLICT (kind) DO UPDATE SET generation = generation + 1",
+                (kind,)
+            )
+            self._db.executemany("INSERT INTO records (kind, position, data) VALUES (?, ?, ?)", rows())
+        return count
+
+    def tombstones(self, kind: str) -> List[int]:
+        """Positions of removed records of a kind."""
+        with self._lock:
+            rows = self._db.execute("SELECT position FROM tombstones WHERE kind = ? ORDER BY position", (kind,))
+            return [position for (position,) in rows]
+
+    def iter_journal(self, start: int = 0) -> Iterator[Tuple[int, List[str], List[int]]]:
+        """Stream (position, new vocabulary terms, term ids) journal rows in position order, from ``start``."""
+        for position, terms, row in self._stream(
+            "SELECT position, terms, row FROM journal WHERE position >= ? ORDER BY position", (start,)
+        ):
+            yield position, json.loads(terms), json.loads(row)
+
+    def clear_journal(self) -> None:
+        """Drop journal rows once an index snapshot covers them."""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM journal")
+
+    def compact(self) -> bool:
+        """Reclaim space left by deleted rows when enough of the file is free.
+
+        Returns True if the database was vacuumed.
+        """
+        with self._lock:
+            page_count = self._db.execute("PRAGMA page_count").fetchone()[0]
+            free_pages = self._db.execute("PRAGMA freelist_count").fetchone()[0]
+            if not page_count or free_pages / page_count < self.COMPACT_FREE_RATIO:
+                return False
+            self._db.execute("VACUUM")
+            return True
+
+
+# Writer locks held by this process: lock path -> [open lock file, stores using it]
+_writer_locks: Dict[str, list] = {}
+_writer_locks_lock = threading.Lock()
+
+
+def _acquire_writer_lock(path: str, kind: str) -> None:
+    """Take the exclusive lock file of a kind, shared by every store in this process."""
+    lock_path = f"{path}.{kind}.lock"
+    with _writer_locks_lock:
+        held = _writer_locks.get(lock_path)
+        if held:
+            held[1] += 1
+            return
+        lock_file = open(lock_path, 'a')
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                raise RuntimeError(
+                    f"Another process is writing {kind} records to {path}; "
+                    "only one process may write each kind"
+                )
+        _writer_locks[lock_path] = [lock_file, 1]
+
+
+def claim_writer(path: str, kind: str) -> bool:
+    """Make this process the writer of a kind for its lifetime; False if another process is."""
+    # The store itself may not exist yet
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    try:
+        _acquire_writer_lock(path, kind)
+    except RuntimeError:
+        return False
+    return True
+
+
+def _release_writer_lock(path: str, kind: str) -> None:
+    lock_path = f"{path}.{kind}.lock"
+    with _writer_locks_lock:
+        held = _writer_locks.get(lock_path)
+        if held:
+            held[1] -= 1
+            if not held[1]:
+                held[0].close()
+                del _writer_locks[lock_path]
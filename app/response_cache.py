@@ -0,0 +1,142 @@
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+
+class ResponseCache:
+    """LRU cache of raw LLM responses backed by a SQLite file.
+
+    Entries live in memory up to ``max_entries`` and are written through to
+    disk so they survive restarts. Entries older than ``ttl_seconds`` are
+    treated as misses in both tiers. The disk tier is pruned every
+    ``PRUNE_INTERVAL`` writes: expired rows are deleted, then the oldest rows
+    beyond ``max_disk_entries``.
+    """
+
+    PRUNE_INTERVAL = 100
+
+    def __init__(self, path: str = "vector_db/llm_cache.sqlite", max_entries: int = 1000,
+                 ttl_seconds: float = 86400, max_disk_entries: int = 10000):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+
+        self._writes = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS ix_responses_created_at ON responses (created_at)")
+        self._prune()
+
+    @staticmethod
+    def make_key(provider: str, model: str, text: str, context: str, today: date = None) -> str:
+        """Build a cache key for one LLM request.
+
+        Whitespace in the task text is normalized so retries and re-pastes
+        hit the same entry. The current date is part of the key because
+        relative dates like "next Friday" resolve differently each day.
+        """
+        normalized = re.sub(r'\s+', ' ', text).strip()
+        today = today or date.today()
+        payload = json.dumps([provider, model, normalized, context, today.isoformat()])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _expired(self, created_at: float) -> bool:
+        return time.time() - created_at > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None on a miss."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                row = self._db.execute(
+                    "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    entry = (row[0], row[1])
+                    self._remember(key, entry)
+
+            if entry is None or self._expired(entry[1]):
+                if entry is not None:
+                    self._forget(key)
+                self.misses += 1
+                return None
+
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: str, value: str) -> None:
+        """Store a response in memory and on disk."""
+        entry = (value, time.time())
+        with self._lock:
+            self._remember(key, entry)
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at) VALUES (?, ?, ?)",
+                (key, entry[0], entry[1])
+            )
+            self._db.commit()
+            self._writes += 1
+            if self._writes % self.PRUNE_INTERVAL == 0:
+                self._prune()
+
+    def _prune(self) -> None:
+        """Delete expired rows, then the oldest rows beyond max_disk_entries."""
+        self._db.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        cursor = self._db.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,)
+        )
+        self.disk_evictions += max(cursor.rowcount, 0)
+        self._db.commit()
+
+    def _remember(self, key: str, entry) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _forget(self, key: str) -> None:
+        self._memory.pop(key, None)
+        self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+        self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and sizes, for sizing the cache."""
+        with self._lock:
+            disk_entries = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'disk_evictions': self.disk_evictions,
+                'memory_entries': len(self._memory),
+                'disk_entries': disk_entries,
+                'max_entries': self.max_entries,
+                'max_disk_entries': self.max_disk_entries,
+                'ttl_seconds': self.ttl_seconds
+            }
@@ -1,25 +1,137 @@
-from flask import Blueprint, render_template, request, jsonify, flash, redirect, url_for
+from flask import Blueprint, Response, current_app, g, render_template, request, jsonify, flash, redirect, url_for
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import selectinload
 from app import db
-from app.models import Task, User, Tag
+from app.models import Task, User
 from app.nlp_processor import NLPProcessor
+from app.tags import link_task_tags, resolve_tag_ids
+from app import metrics
 from datetime import datetime
+import base64
+import json
+import threading
+import time
 
 main = Blueprint('main', __name__)
-nlp = NLPProcessor()
+
+_nlp = None
+_nlp_lock = threading.Lock()
+
+def get_nlp():
+    """Return the shared NLPProcessor, creating it on first use."""
+    global _nlp
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                _nlp = NLPProcessor()
+    return _nlp
+
+@main.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    metrics.start_request()
+
+@main.after_request
+def record_request_time(response):
+    elapsed = time.perf_counter() - g.request_start
+    stages = metrics.finish_request()
+    metrics.REQUEST_SECONDS.observe(
+        elapsed, endpoint=request.endpoint or 'unknown', method=request.method, status=response.status_code
+    )
+    if current_app.config.get('TIMING_HEADER'):
+        stages['total'] = elapsed
+        response.headers['Server-Timing'] = metrics.server_timing(stages)
+    return response
+
+@main.route('/metrics')
+def metrics_endpoint():
+    # Report index sizes only once something else has loaded the store
+    if _nlp is not None:
+        for index, sizes in _nlp.vector_store.index_stats().items():
+            for unit, size in sizes.items():
+                metrics.INDEX_SIZE.set(size, index=index, unit=unit)
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
 
 @main.route('/')
 def index():
     return render_template('index.html')
 
+TASKS_PAGE_SIZE = 50
+TASKS_MAX_PAGE_SIZE = 200
+
+def _encode_cursor(task):
+    """Encode the (created_at, id) position of a task as an opaque cursor."""
+    payload = json.dumps([task.created_at.isoformat(), task.id])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+def _decode_cursor(cursor):
+    created_at, task_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    return datetime.fromisoformat(created_at), int(task_id)
+
+def _parse_date_arg(name):
+    value = request.args.get(name)
+    return datetime.fromisoformat(value) if value else None
+
 @main.route('/tasks')
 def tasks():
-    tasks = Task.query.order_by(Task.created_at.desc()).all()
+    status = request.args.get('status', 'all')
+    project = request.args.get('project')
+    priority = request.args.get('priority')
+
+    try:
+        limit = max(1, min(int(request.args.get('limit', TASKS_PAGE_SIZE)), TASKS_MAX_PAGE_SIZE))
+        due_after = _parse_date_arg('due_after')
+        due_before = _parse_date_arg('due_before')
+        cursor = request.args.get('cursor')
+        position = _decode_cursor(cursor) if cursor else None
+    except (ValueError, TypeError):
+        return jsonify({'success': False, 'error': 'Invalid pagination or filter arguments'}), 400
+
+    # Load tags in one extra query instead of one query per task
+    query = Task.query.options(selectinload(Task.tags))
+
+    # Server-side filters
+    if status and status != 'all':
+        query = query.filter(Task.status == status)
+    if project:
+        # Case-insensitive, like the project filters in the UI; ix_task_lower_project_status applies
+        query = query.filter(func.lower(Task.project) == project.lower())
+    if priority:
+        query = query.filter(func.lower(Task.priority) == priority.lower())
+    if due_after:
+        query = query.filter(Task.due_date >= due_after)
+    if due_before:
+        query = query.filter(Task.due_date <= due_before)
+
+    # Keyset pagination: continue strictly after the cursor's (created_at, id)
+    if position:
+        created_at, task_id = position
+        query = query.filter(or_(
+            Task.created_at < created_at,
+            and_(Task.created_at == created_at, Task.id < task_id)
+        ))
+
+    with metrics.request_stage('tasks', 'db_query'):
+        tasks = query.order_by(Task.created_at.desc(), Task.id.desc()).limit(limit + 1).all()
+    next_cursor = _encode_cursor(tasks[limit - 1]) if len(tasks) > limit else None
+    tasks = tasks[:limit]
+
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        return jsonify({
-            'success': True,
-            'tasks': [task.to_dict() for task in tasks]
-        })
-    return render_template('tasks.html', tasks=tasks)
+        with metrics.request_stage('tasks', 'serialize'):
+            return jsonify({
+                'success': True,
+                'tasks': [task.to_dict() for task in tasks],
+                'next_cursor': next_cursor
+            })
+
+    page_args = {key: value for key, value in request.args.items() if key != 'cursor'}
+    with metrics.request_stage('tasks', 'render'):
+        return render_template(
+            'tasks.html',
+            tasks=tasks,
+            current_status=status,
+            next_url=url_for('main.tasks', cursor=next_cursor, **page_args) if next_cursor else None
+        )
 
 @main.route('/process_task', methods=['POST'])
 def process_task():
@@ -34,37 +146,16 @@ def process_task():
 
     try:
         # Process with NLP
-        processed = nlp.process_task(task_text)
-        
-        # Create new task
-        task = Task(
-            content=task_text,
-            raw_input=task_text,
-            status='pending',
-            user_id=1,  # Using the test user ID
-            priority=processed.get('priority', 'medium'),
-            project=processed.get('project'),
-            due_date=processed.get('due_date')
-        )
+        with metrics.request_stage('process_task', 'nlp'):
+            processed = get_nlp().process_task(task_text)
         
-        # Add task to session first
-        db.session.add(task)
-        db.session.flush()  # Ensure task has an ID before adding tags
-        
-        # Handle tags
-        if processed.get('tags'):
-            for tag_name in processed['tags']:
-                # Check if tag exists
-                tag = Tag.query.filter_by(name=tag_name).first()
-                if not tag:
-                    # Create new tag
-                    tag = Tag(name=tag_name)
-                    db.session.add(tag)
-                    db.session.flush()  # Ensure tag has an ID
-                task.tags.append(tag)
+        # Create new task with its tags
+        with metrics.request_stage('process_task', 'db_write'):
+            task = _create_task(task_text, processed, resolve_tag_ids(processed.get('tags') or []))
         
         # Commit all changes
-        db.session.commit()
+        with metrics.request_stage('process_task', 'db_commit'):
+            db.session.commit()
         
         return jsonify({
             'success': True,
@@ -76,6 +167,97 @@ def process_task():
         print(f"Error in process_task: {str(e)}")  # Add logging
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@main.route('/process_tasks', methods=['POST'])
+def process_tasks():
+    data = request.get_json(silent=True) or {}
+    texts = data.get('task_descriptions')
+
+    if not isinstance(texts, list) or not texts:
+        return jsonify({'success': False, 'error': 'No task texts provided'}), 400
+
+    max_batch_size = get_nlp().batch_config.get('max_batch_size', 100)
+    if len(texts) > max_batch_size:
+        return jsonify({
+            'success': False,
+            'error': f'Too many tasks in one batch (max {max_batch_size})'
+        }), 400
+
+    # Only non-empty strings reach the LLM; other items get a per-index error
+    valid = [index for index, text in enumerate(texts) if isinstance(text, str) and text.strip()]
+    outcomes = [(None, 'Task text must be a non-empty string')] * len(texts)
+
+    # Call the LLM for every valid text concurrently
+    if valid:
+        with metrics.request_stage('process_tasks', 'nlp'):
+            processed_texts = get_nlp().process_tasks([texts[index] for index in valid])
+        for index, outcome in zip(valid, processed_texts):
+            outcomes[index] = outcome
+
+    results = []
+    created = []
+    try:
+        with metrics.request_stage('process_tasks', 'db_write'):
+            # Resolve the tags of the whole batch at once
+            tag_ids = resolve_tag_ids(
+                tag_name
+                for processed, _ in outcomes if processed
+                for tag_name in processed.get('tags') or []
+            )
+
+            # Insert every processed task and its tags in a single transaction
+            for index, (text, (processed, error)) in enumerate(zip(texts, outcomes)):
+                if processed is None:
+                    results.append({'index': index, 'success': False, 'error': error})
+                    continue
+                task = _create_task(text, processed, tag_ids)
+                created.append(task)
+                results.append({'index': index, 'success': True, 'task': task})
+
+        with metrics.request_stage('process_tasks', 'db_commit'):
+            db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error in process_tasks: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+    for result in results:
+        if result['success']:
+            result['task'] = result['task'].to_dict()
+
+    return jsonify({
+        'success': all(result['success'] for result in results),
+        'created': len(created),
+        'results': results
+    })
+
+def _create_task(task_text, processed, tag_ids):
+    """Add a Task built from processed LLM output to the session, with its tags.
+
+    ``tag_ids`` maps tag names to ids, as returned by resolve_tag_ids.
+    """
+    task = Task(
+        content=task_text,
+        raw_input=task_text,
+        status='pending',
+        user_id=1,  # Using the test user ID
+        priority=processed.get('priority', 'medium'),
+        project=processed.get('project'),
+        due_date=processed.get('due_date')
+    )
+    
+    # Add task to session first
+    db.session.add(task)
+    db.session.flush()  # Ensure task has an ID before adding tags
+    
+    # Handle tags
+    link_task_tags(task.id, (tag_ids[name] for name in processed.get('tags') or [] if name in tag_ids))
+
+    return task
+
+@main.route('/cache/stats')
+def cache_stats():
+    return jsonify({'success': True, 'cache': get_nlp().cache_stats()})
+
 @main.route('/update_task/<int:task_id>', methods=['POST'])
 def update_task(task_id):
     task = Task.query.get_or_404(task_id)
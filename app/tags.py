@@ -0,0 +1,125 @@
+from collections import OrderedDict
+from typing import Dict, Iterable, List
+import threading
+from sqlalchemy import event, inspect, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Tag, task_tags
+
+
+class TagCache:
+    """Bounded, thread-safe LRU cache of tag name -> id."""
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._ids = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, names: Iterable[str]) -> Dict[str, int]:
+        with self._lock:
+            found = {}
+            for name in names:
+                if name in self._ids:
+                    self._ids.move_to_end(name)
+                    found[name] = self._ids[name]
+            return found
+
+    def put_many(self, ids: Dict[str, int]) -> None:
+        with self._lock:
+            for name, tag_id in ids.items():
+                self._ids[name] = tag_id
+                self._ids.move_to_end(name)
+            while len(self._ids) > self.max_size:
+                self._ids.popitem(last=False)
+
+    def invalidate(self, names: Iterable[str] = None) -> None:
+        """Drop the given names, or everything when names is None."""
+        with self._lock:
+            if names is None:
+                self._ids.clear()
+            else:
+                for name in names:
+                    self._ids.pop(name, None)
+
+
+tag_cache = TagCache()
+
+
+def resolve_tag_ids(names: Iterable[str]) -> Dict[str, int]:
+    """Return ids for the given tag names, creating missing tags in bulk.
+
+    Uncached names are looked up with a single IN query and any that do not
+    exist are inserted with one conflict-tolerant INSERT, so concurrent
+    workers creating the same tag do not fail. Ids are only cached once the
+    surrounding transaction commits.
+    """
+    names = list(dict.fromkeys(name for name in names if name))
+    ids = tag_cache.get_many(names)
+    missing = [name for name in names if name not in ids]
+    if not missing:
+        return ids
+
+    found = _select_tag_ids(missing)
+    unknown = [name for name in missing if name not in found]
+    if unknown:
+        _insert_tags(unknown)
+        found.update(_select_tag_ids(unknown))
+
+    db.session.info.setdefault('resolved_tag_ids', {}).update(found)
+    ids.update(found)
+    return ids
+
+
+def link_task_tags(task_id: int, tag_ids: Iterable[int]) -> None:
+    """Attach tags to a task with one bulk insert into task_tags."""
+    rows = [{'task_id': task_id, 'tag_id': tag_id} for tag_id in dict.fromkeys(tag_ids)]
+    if rows:
+        db.session.execute(task_tags.insert(), rows)
+
+
+def _select_tag_ids(names: List[str]) -> Dict[str, int]:
+    rows = db.session.execute(select(Tag.name, Tag.id).where(Tag.name.in_(names)))
+    return {name: tag_id for name, tag_id in rows}
+
+
+def _insert_tags(names: List[str]) -> None:
+    dialect = db.session.get_bind().dialect.name
+    values = [{'name': name} for name in names]
+
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        db.session.execute(insert(Tag).values(values).on_conflict_do_nothing(index_elements=['name']))
+        return
+
+    # Other backends: insert one by one, tolerating tags created concurrently
+    for value in values:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(Tag.__table__.insert().values(**value))
+        except IntegrityError:
+            pass
+
+
+@event.listens_for(Session, 'after_commit')
+def _cache_committed_tag_ids(session):
+    tag_cache.put_many(session.info.pop('resolved_tag_ids', {}))
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_uncommitted_tag_ids(session):
+    session.info.pop('resolved_tag_ids', None)
+
+
+@event.listens_for(Tag, 'after_update')
+def _invalidate_updated_tag(mapper, connection, target):
+    history = inspect(target).attrs.name.history
+    tag_cache.invalidate(list(history.deleted or []) + [target.name])
+
+
+@event.listens_for(Tag, 'after_delete')
+def _invalidate_deleted_tag(mapper, connection, target):
+    tag_cache.invalidate([target.name])
@@ -0,0 +1,167 @@
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional
+import re
+import nltk
+from nltk.tokenize import word_tokenize
+from nltk.corpus import stopwords
+from nltk.stem import WordNetLemmatizer
+
+
+class Tokenizer(ABC):
+    """Lowercase, split, drop stopwords and lemmatize text.
+
+    Subclasses only decide how text is split into tokens. Lemmas are memoized
+    in a bounded LRU cache because a small set of words makes up most of the
+    tokens we see.
+    """
+
+    name = None
+    # (resource path, package) pairs of NLTK data this tokenizer needs
+    nltk_resources = [('corpora/stopwords', 'stopwords'), ('corpora/wordnet', 'wordnet')]
+
+    def __init__(self, lemma_cache_size: int = 50000):
+        self.lemma_cache_size = lemma_cache_size
+        self.lemmatizer = WordNetLemmatizer()
+        self.stop_words = set(stopwords.words('english'))
+        self._lemmatize = lru_cache(maxsize=lemma_cache_size)(self.lemmatizer.lemmatize)
+
+    @abstractmethod
+    def split(self, text: str) -> List[str]:
+        """Split lowercased text into raw tokens."""
+
+    def preprocess(self, text: str) -> List[str]:
+        """Preprocess text by tokenizing, removing stopwords, and lemmatizing."""
+        return [
+            self._lemmatize(token)
+            for token in self.split(text.lower())
+            if token.isalnum() and token not in self.stop_words
+        ]
+
+    def preprocess_batch(self, texts: List[str], processes: Optional[int] = None,
+                         chunksize: int = 256, executor: Optional[ProcessPoolExecutor] = None) -> List[List[str]]:
+        """Preprocess many texts in one call, optionally across a process pool.
+
+        Pass an ``executor`` from ``process_pool`` to reuse one pool across
+        calls; ``processes`` starts a pool for this call only.
+        """
+        if len(texts) < chunksize or (executor is None and (not processes or processes < 2)):
+            return [self.preprocess(text) for text in texts]
+
+        if executor is not None:
+            return list(executor.map(_preprocess_in_worker, texts, chunksize=chunksize))
+        with self.process_pool(processes) as executor:
+            return list(executor.map(_preprocess_in_worker, texts, chunksize=chunksize))
+
+    def process_pool(self, processes: int) -> ProcessPoolExecutor:
+        """Worker processes with this tokenizer loaded, for ``preprocess_batch``."""
+        return ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=_init_worker,
+            initargs=(self.name, self.lemma_cache_size)
+        )
+
+    def lemma_cache_info(self):
+        """Hit/miss statistics of the lemma cache."""
+        return self._lemmatize.cache_info()
+
+
+class NLTKTokenizer(Tokenizer):
+    """Reference tokenizer using NLTK's punkt + Treebank word_tokenize."""
+
+    name = 'nltk'
+    nltk_resources = Tokenizer.nltk_resources + [('tokenizers/punkt', 'punkt')]
+
+    def split(self, text: str) -> List[str]:
+        return word_tokenize(text)
+
+
+class RegexTokenizer(Tokenizer):
+    """Fast tokenizer that mirrors word_tokenize for alphanumeric tokens.
+
+    Only fully alphanumeric tokens survive preprocessing, so instead of
+    running the Treebank rules we find alphanumeric runs that word_tokenize
+    would also have emitted as standalone tokens. Runs glued to characters
+    Treebank keeps inside a token (hyphens, slashes, apostrophes, inner
+    periods, digit separators) are skipped, and contractions are split the
+    way Treebank splits them, dropping the non-alphanumeric half.
+    """
+
+    name = 'regex'
+
+    CONTRACTIONS = [
+        (re.compile(r"\b(can)(not)\b"), r"\1 \2"),
+        (re.compile(r"\b(d)('ye)\b"), r"\1 "),
+        (re.compile(r"\b(gim)(me)\b"), r"\1 \2"),
+        (re.compile(r"\b(gon)(na)\b"), r"\1 \2"),
+        (re.compile(r"\b(got)(ta)\b"), r"\1 \2"),
+        (re.compile(r"\b(lem)(me)\b"), r"\1 \2"),
+        (re.compile(r"\b(more)('n)\b"), r"\1 "),
+        # Treebank only splits "wanna" before whitespace, which punctuation gets padded with
+        (re.compile(r"\b(wan)(na)(?=[^\w\-/+=~^|\\]|--|$)"), r"\1 \2"),
+        (re.compile(r" ('t)(is|was)\b"), r"  \2"),
+        (re.compile(r"(?<=[^' ])(n't|'ll|'re|'ve|'s|'m|'d)(?=[^\w'\-/+=~^|\\]|$)"), r" "),
+    ]
+    TOKEN = re.compile(
+        r"(?<![\w/+=~^|\\])"             # not glued to a preceding token character
+        r"(?<!(?<!-)-)(?<!\w')"           # nor to a single hyphen or inner apostrophe
+        r"(?<!(?<!\.)\.)"                 # nor to a period that is not an ellipsis
+        r"(?:(?<![,:])|(?!\d))"            # nor to a separator inside a number
+        r"[^\W_]+"
+        r"(?![\w/+=~^|\\])"              # not glued to a following token character
+        r"(?!-(?!-))(?!'\w)"
+        r"(?!\.[^\s.])(?![,:]\d)"
+    )
+
+    def split(self, text: str) -> List[str]:
+        for pattern, replacement in self.CONTRACTIONS:
+            text = pattern.sub(replacement, text)
+        return self.TOKEN.findall(text)
+
+
+TOKENIZERS: Dict[str, type] = {
+    NLTKTokenizer.name: NLTKTokenizer,
+    RegexTokenizer.name: RegexTokenizer,
+}
+
+
+def get_tokenizer(name: str = 'nltk', **kwargs) -> Tokenizer:
+    """Create a tokenizer by name ('nltk' or 'regex')."""
+    try:
+        tokenizer_class = TOKENIZERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown tokenizer: {name}")
+    ensure_nltk_data(tokenizer_class.nltk_resources)
+    return tokenizer_class(**kwargs)
+
+
+_available_resources = set()
+
+
+def ensure_nltk_data(resources) -> None:
+    """Download NLTK data packages that are not installed locally.
+
+    Installed packages are found with nltk.data.find, so no network access
+    happens when everything is already present.
+    """
+    for path, package in resources:
+        if path in _available_resources:
+            continue
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            nltk.download(package, quiet=True)
+        _available_resources.add(path)
+
+
+_worker_tokenizer = None
+
+
+def _init_worker(name: str, lemma_cache_size: int) -> None:
+    global _worker_tokenizer
+    _worker_tokenizer = get_tokenizer(name, lemma_cache_size=lemma_cache_size)
+
+
+def _preprocess_in_worker(text: str) -> List[str]:
+    return _worker_tokenizer.preprocess(text)
@@ -1,67 +1,266 @@
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Iterable, Tuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import json
 from datetime import datetime
+import time
+import threading
 import numpy as np
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
 import joblib
+from .bitset_index import BitsetIndex
+from .collection import Collection
+from .minhash_index import MinHashIndex
+from .metrics import VECTOR_STORE_SECONDS
+from .inverted_index import InvertedIndex
+from .record_store import RecordStore
+from .tokenizer import get_tokenizer
 
 class VectorStore:
-    def __init__(self, persist_directory: str = "vector_db"):
+    # Index rows journaled before the index is snapshotted and the journal cleared
+    SNAPSHOT_JOURNAL_ROWS = 10000
+
+    # Compact once removed tasks reach this many and this fraction of stored tasks
+    COMPACT_MIN_TOMBSTONES = 64
+    COMPACT_TOMBSTONE_RATIO = 0.2
+
+    # Attributes populated by load(); touching any of them triggers the load
+    _LAZY_ATTRIBUTES = frozenset([
+        'tokenizer', 'tasks_data', 'projects_data', 'vocabulary', 'index',
+        'project_vocabulary', 'project_index', 'tasks_collection', 'projects_collection'
+    ])
+
+    # Task similarity engines: postings lookup, packed bitsets scored with
+    # popcount, or approximate MinHash/LSH candidates re-ranked exactly
+    ENGINES = ('inverted', 'bitset', 'minhash')
+
+    def __init__(self, persist_directory: str = "vector_db", tokenizer: str = 'nltk',
+                 processes: int = None, lazy: bool = True, engine: str = 'inverted',
+                 minhash_bands: int = 16, minhash_rows: int = 4):
+        if engine not in VectorStore.ENGINES:
+            raise ValueError(f"Unknown similarity engine: {engine}")
         self.persist_directory = persist_directory
+        self.tokenizer_name = tokenizer
+        self.processes = processes
+        self.engine = engine
+        self.minhash_bands = minhash_bands
+        self.minhash_rows = minhash_rows
+        self._engine_index = None
+        self._engine_source = None
+        self._load_lock = threading.RLock()
+        # Readers and in-place index updates hold the index lock; writers
+        # also hold the write lock, so a rebuild can run without blocking searches
+        self._index_lock = threading.RLock()
+        self._write_lock = threading.RLock()
+        self._compacting = False
+        self._loaded = False
         os.makedirs(persist_directory, exist_ok=True)
         
-        # Download required NLTK data
-        nltk.download('punkt')
-        nltk.download('stopwords')
-        nltk.download('wordnet')
-        
-        self.lemmatizer = WordNetLemmatizer()
-        self.stop_words = set(stopwords.words('english'))
-        
         self.tasks_file = os.path.join(persist_directory, 'tasks.json')
         self.projects_file = os.path.join(persist_directory, 'projects.json')
         self.vectors_file = os.path.join(persist_directory, 'vectors.joblib')
+        self.index_file = os.path.join(persist_directory, 'index.npy')
+        self.minhash_file = os.path.join(persist_directory, 'minhash.npz')
         self.vocab_file = os.path.join(persist_directory, 'vocab.joblib')
+        self.journal_file = os.path.join(persist_directory, 'journal.jsonl')
+        self.project_index_file = os.path.join(persist_directory, 'project_index.joblib')
+        self.git_state_file = os.path.join(persist_directory, 'git_state.json')
+        self.store_file = os.path.join(persist_directory, 'store.sqlite')
         
-        # Load or initialize data
-        self.tasks_data = self._load_json(self.tasks_file, [])
-        self.projects_data = self._load_json(self.projects_file, [])
+        if not lazy:
+            self.load()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'VectorStore':
+        """Create the store described by the ``[vector_store]`` table of a loaded config.toml."""
+        store_config = config.get('vector_store', {})
+        return cls(
+            tokenizer=store_config.get('tokenizer', 'nltk'),
+            processes=store_config.get('processes'),
+            engine=store_config.get('engine', 'inverted'),
+            minhash_bands=store_config.get('minhash_bands', 16),
+            minhash_rows=store_config.get('minhash_rows', 4)
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        # Only reached for attributes that are not set yet
+        if name in VectorStore._LAZY_ATTRIBUTES:
+            self.load()
+            return self.__dict__[name]
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def load(self) -> None:
+        """Load the tokenizer, stored data and indexes.
+
+        Construction is cheap; this runs on first use, or can be called
+        up front to warm the store before serving requests.
+        """
+        with self._load_lock:
+            if self._loaded:
+                return
+
+            self.tokenizer = get_tokenizer(self.tokenizer_name)
+            
+            # Load or initialize data
+            self._storage = RecordStore(self.store_file)
+            self._migrate_json()
+            # Read before the records, so writes made while loading are picked up by refresh()
+            self._data_version = self._storage.data_version()
+            self._load_tasks()
+            self.projects_data = list(self._storage.iter_records('project'))
+            self._load_project_index()
+
+            # Id-keyed collections used by the markdown scanner
+            self.tasks_collection = Collection(self, 'tasks', self._storage)
+            self.projects_collection = Collection(self, 'projects', self._storage)
+            self._loaded = True
+
+    def _load_tasks(self) -> None:
+        """Load the stored tasks and their index from the snapshot and journal."""
+        self._task_generation = self._storage.generation('task')
+        self.tasks_data = list(self._storage.iter_records('task'))
+        self._tombstones = set(self._storage.tombstones('task'))
+        self._tombstone_mask = None
+        self._task_positions = _positions_by_id(self.tasks_data, self._tombstones)
         self._load_vectors()
+        self._replay_journal()
+        # False once this process indexes tasks itself without saving a snapshot
+        self._index_matches_store = True
+
+    def refresh(self) -> None:
+        """Pick up tasks and projects that other processes stored since the last load.
+
+        App workers that do not run the indexer only read the store. This
+        costs one pragma when nothing changed; otherwise it reads the task
+        records, journal rows and tombstones past what is loaded, and loads
+        the tasks again only after the writer rewrote or snapshotted them.
+        """
+        if not self._loaded:
+            return
+        data_version = self._storage.data_version()
+        if data_version == self._data_version:
+            return
+        # A writer in this process is busy; catch up on the next search
+        if not self._write_lock.acquire(blocking=False):
+            return
+        try:
+            self._data_version = data_version
+            self._refresh_tasks()
+            projects = list(self._storage.iter_records('project', len(self.projects_data)))
+            if projects:
+                with self._index_lock:
+                    self.projects_data.extend(projects)
+        finally:
+            self._write_lock.release()
+
+    def _refresh_tasks(self) -> None:
+        """Apply task writes made by another process; needs the write lock."""
+        if self._storage.generation('task') != self._task_generation:
+            # Compacted or rebuilt: every position may have moved
+            with self._index_lock:
+                self._load_tasks()
+            return
+
+        first_position = len(self.tasks_data)
+        tasks = list(self._storage.iter_records('task', first_position))
+        end = first_position + len(tasks)
+        rows = [journal_row for journal_row in self._storage.iter_journal(first_position) if journal_row[0] < end]
+        # Read after the records, so tombstones of every loaded task are seen
+        tombstones = {position for position in self._storage.tombstones('task') if position < end}
+        tombstones -= self._tombstones
+        if not tasks and not tombstones:
+            return
+
+        extend_index = len(self.index) == first_position
+        if extend_index and (not self._index_matches_store or
+                             [position for position, _, _ in rows] != list(range(first_position, end))):
+            # The journal was folded into a new snapshot, or this index has its own vocabulary
+            with self._index_lock:
+                self._load_tasks()
+            return
+
+        with self._index_lock:
+            if extend_index:
+                keep_engine_index = self._engine_index is not None and self._engine_source is self.index
+                for _, terms, row in rows:
+                    for term in terms:
+                        self.vocabulary[term] = len(self.vocabulary)
+                    self.index.add(row)
+                    if keep_engine_index:
+                        self._engine_index.add(row)
+            for offset, task in enumerate(tasks):
+                self._task_positions.setdefault(task['id'], []).append(first_position + offset)
+            self.tasks_data.extend(tasks)
+
+            for position in tombstones:
+                task_id = self.tasks_data[position]['id']
+                positions = self._task_positions.get(task_id, [])
+                if position in positions:
+                    positions.remove(position)
+                    if not positions:
+                        del self._task_positions[task_id]
+            if tombstones:
+                self._tombstones.update(tombstones)
+                self._tombstone_mask = None
+
+    def index_stats(self) -> Dict[str, Dict[str, int]]:
+        """Sizes of the loaded indexes; empty until the store is loaded."""
+        if not self._loaded:
+            return {}
+        return {
+            'tasks': {
+                'documents': len(self.tasks_data),
+                'terms': len(self.vocabulary),
+                'tombstones': len(self._tombstones)
+            },
+            'projects': {'documents': len(self.projects_data), 'terms': len(self.project_vocabulary)},
+            'journal': {'rows': self._journal_rows}
+        }
 
     def _preprocess_text(self, text: str) -> List[str]:
         """Preprocess text by tokenizing, removing stopwords, and lemmatizing."""
-        # Tokenize
-        tokens = word_tokenize(text.lower())
-        
-        # Remove stopwords and lemmatize
-        tokens = [
-            self.lemmatizer.lemmatize(token)
-            for token in tokens
-            if token.isalnum() and token not in self.stop_words
-        ]
-        
-        return tokens
+        return self.tokenizer.preprocess(text)
 
-    def _text_to_vector(self, text: str) -> np.ndarray:
-        """Convert text to a binary vector using vocabulary."""
-        tokens = self._preprocess_text(text)
-        vector = np.zeros(len(self.vocabulary))
-        
+    def _preprocess_batch(self, texts: List[str], executor: ProcessPoolExecutor = None) -> List[List[str]]:
+        """Preprocess many texts at once, in ``executor``'s worker processes if given."""
+        return self.tokenizer.preprocess_batch(texts, executor=executor)
+
+    def _rebuild_pool(self) -> ProcessPoolExecutor:
+        """One tokenizer process pool for a whole rebuild, or None.
+
+        Pools are only started from the main thread, so the app's request
+        and background threads never fork a multithreaded server.
+        """
+        if not self.processes or self.processes < 2 or threading.current_thread() is not threading.main_thread():
+            return None
+        return self.tokenizer.process_pool(self.processes)
+
+    def _tokens_to_term_ids(self, tokens: List[str], vocabulary: Dict[str, int] = None) -> List[int]:
+        """Convert preprocessed tokens to the sorted ids of in-vocabulary terms."""
+        if vocabulary is None:
+            vocabulary = self.vocabulary
+        return sorted({vocabulary[token] for token in tokens if token in vocabulary})
+
+    def _extend_vocabulary(self, tokens: List[str], vocabulary: Dict[str, int] = None) -> Tuple[List[int], List[str]]:
+        """Convert tokens to term ids, appending unseen terms to the vocabulary.
+
+        Existing terms keep their ids, so rows already in the index stay valid.
+        Returns the term ids and the newly added terms in id order.
+        """
+        if vocabulary is None:
+            vocabulary = self.vocabulary
+        term_ids = set()
+        new_terms = []
         for token in tokens:
-            if token in self.vocabulary:
-                vector[self.vocabulary[token]] = 1
-                
-        return vector
+            if token not in vocabulary:
+                vocabulary[token] = len(vocabulary)
+                new_terms.append(token)
+            term_ids.add(vocabulary[token])
+        return sorted(term_ids), new_terms
 
-    def _build_vocabulary(self, texts: List[str]) -> Dict[str, int]:
-        """Build vocabulary from all texts."""
+    def _build_vocabulary(self, token_lists: List[List[str]]) -> Dict[str, int]:
+        """Build vocabulary from preprocessed texts."""
         vocab = set()
-        for text in texts:
-            tokens = self._preprocess_text(text)
+        for tokens in token_lists:
             vocab.update(tokens)
         
         return {word: idx for idx, word in enumerate(sorted(vocab))}
@@ -74,154 +273,648 @@ class VectorStore:
         return default
 
     def _save_json(self, file_path: str, data: Any) -> None:
-        """Save data to JSON file."""
-        with open(file_path, 'w', encoding='utf-8') as f:
+        """Save data to JSON file, replacing it atomically."""
+        tmp_path = f"{file_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=2)
+        os.replace(tmp_path, file_path)
+
+    def _migrate_json(self) -> None:
+        """Move tasks.json, journal.jsonl and projects.json into the record store.
+
+        Runs once per kind, when the store has no records of that kind yet,
+        and gives up the kind's writer lock afterwards so read-only processes
+        don't keep it. The JSON files are kept with a .migrated suffix.
+        """
+        if os.path.exists(self.tasks_file) and not self._storage.count('task'):
+            tasks = self._load_json(self.tasks_file, [])
+            journal = []
+            if os.path.exists(self.journal_file):
+                with open(self.journal_file, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        record = json.loads(line)
+                        # Skip records already folded into tasks.json
+                        if record['position'] < len(tasks):
+                            continue
+                        tasks.append(record['task'])
+                        journal.append((record['position'], record['terms'], record['row']))
+            with self._storage.writing('task'):
+                self._storage.add('task', 0, tasks, journal)
+            for path in (self.tasks_file, self.journal_file):
+                if os.path.exists(path):
+                    os.replace(path, f"{path}.migrated")
+
+        if os.path.exists(self.projects_file) and not self._storage.count('project'):
+            with self._storage.writing('project'):
+                self._storage.add('project', 0, self._load_json(self.projects_file, []))
+            os.replace(self.projects_file, f"{self.projects_file}.migrated")
 
     def _load_vectors(self) -> None:
-        """Load or initialize vectors and vocabulary."""
-        if os.path.exists(self.vectors_file) and os.path.exists(self.vocab_file):
-            self.vectors = joblib.load(self.vectors_file)
-            self.vocabulary = joblib.load(self.vocab_file)
-        else:
-            self.vectors = None
-            self.vocabulary = {}
+        """Load or initialize the task index and vocabulary.
+
+        The index file is memory-mapped read-only, so processes sharing a
+        store directory share its pages instead of each holding a copy.
+        """
+        self.vocabulary = {}
+        self.index = InvertedIndex()
+        self.convert_legacy_vectors()
+        if os.path.exists(self.index_file) and os.path.exists(self.vocab_file):
+            vocabulary = joblib.load(self.vocab_file)
+            index, n_terms = InvertedIndex.load(self.index_file)
+            # Both files are written on every snapshot; ignore a mismatched pair
+            if n_terms == len(vocabulary):
+                self.vocabulary = vocabulary
+                self.index = index
+
+    def convert_legacy_vectors(self) -> bool:
+        """Convert a dense vectors.joblib snapshot into the compact index file.
+
+        vectors.joblib is kept with a .migrated suffix. Returns True if a
+        conversion happened.
+        """
+        if os.path.exists(self.index_file) or not os.path.exists(self.vectors_file):
+            return False
+        vectors = joblib.load(self.vectors_file)
+        InvertedIndex.from_matrix(vectors).save(self.index_file, np.atleast_2d(vectors).shape[1])
+        os.replace(self.vectors_file, f"{self.vectors_file}.migrated")
+        return True
 
     def _save_vectors(self) -> None:
-        """Save vectors and vocabulary."""
-        if self.vectors is not None:
-            joblib.dump(self.vectors, self.vectors_file)
-            joblib.dump(self.vocabulary, self.vocab_file)
-
-    def _compute_similarity(self, query_vector: np.ndarray, vectors: np.ndarray) -> np.ndarray:
-        """Compute cosine similarity between query vector and all vectors."""
-        # Add small epsilon to avoid division by zero
-        epsilon = 1e-8
-        return np.dot(vectors, query_vector) / (
-            np.maximum(
-                np.linalg.norm(vectors, axis=1) * np.linalg.norm(query_vector),
-                epsilon
-            )
-        )
+        """Save the task index and vocabulary."""
+        if len(self.index):
+            self.index.save(self.index_file, len(self.vocabulary))
+            self._dump_atomic(self.vocabulary, self.vocab_file)
+
+    def _dump_atomic(self, value: Any, file_path: str) -> None:
+        """joblib.dump to a temporary file and move it into place."""
+        tmp_path = f"{file_path}.tmp"
+        joblib.dump(value, tmp_path)
+        os.replace(tmp_path, file_path)
+
+    def _replay_journal(self) -> None:
+        """Apply index rows journaled since the last index snapshot.
+
+        The snapshot is the saved vectors and vocabulary. Each journal row
+        holds one task's index row and the vocabulary terms it introduced,
+        so replaying it needs no tokenization. If the rows do not continue
+        the snapshot, the index is left short and rebuilt on first use.
+        """
+        self._journal_rows = 0
+        for position, terms, row in self._storage.iter_journal():
+            self._journal_rows += 1
+            # Skip rows already folded into the snapshot
+            if position < len(self.index):
+                continue
+            if position != len(self.index) or position >= len(self.tasks_data):
+                break
+            for term in terms:
+                self.vocabulary[term] = len(self.vocabulary)
+            self.index.add(row)
+
+    def _save_snapshot(self) -> None:
+        """Persist vectors in full, start a new journal and reclaim free space."""
+        self._save_vectors()
+        if self.engine == 'minhash':
+            if self._engine_source is self.index:
+                self._engine_index.save(self.minhash_file, self.vocabulary)
+            elif os.path.exists(self.minhash_file):
+                # Signatures of a replaced index; rebuilt on the next search
+                os.remove(self.minhash_file)
+        self._storage.clear_journal()
+        self._journal_rows = 0
+        self._storage.compact()
+
+    def _append_tasks(self, tasks: List[Dict[str, Any]], token_lists: List[List[str]],
+                      replaced_ids: Iterable[Any] = ()) -> int:
+        """Index tasks and commit them with their journal rows in one transaction.
+
+        Stored tasks with an id in ``replaced_ids`` are tombstoned in the same
+        transaction. Returns the number of tasks tombstoned.
+        """
+        with self._write_lock:
+            with self._index_lock:
+                tombstones = self._append_tasks_locked(tasks, token_lists, replaced_ids)
+            # Writing the snapshot is O(N); only writers wait for it, searches keep going
+            if self._journal_rows >= self.SNAPSHOT_JOURNAL_ROWS:
+                self._save_snapshot()
+
+        if tombstones:
+            self._compact_if_needed()
+        return len(tombstones)
+
+    def _append_tasks_locked(self, tasks: List[Dict[str, Any]], token_lists: List[List[str]],
+                             replaced_ids: Iterable[Any]) -> List[int]:
+        """The in-place part of ``_append_tasks``; needs both locks. Returns the tombstoned positions."""
+        first_position = len(self.tasks_data)
+        first_new_term = len(self.vocabulary)
+        replaced_ids = set(replaced_ids)
+        tombstones = [
+            position for task_id in replaced_ids for position in self._task_positions.get(task_id, ())
+        ]
+        journal = []
+        for offset, tokens in enumerate(token_lists):
+            row, new_terms = self._extend_vocabulary(tokens)
+            journal.append((first_position + offset, new_terms, row))
+
+        try:
+            self._storage.add('task', first_position, tasks, journal, tombstones)
+        except Exception:
+            # Forget the terms so the vocabulary still matches the journal
+            for term in [term for term, term_id in self.vocabulary.items() if term_id >= first_new_term]:
+                del self.vocabulary[term]
+            raise
+
+        for task_id in replaced_ids:
+            self._task_positions.pop(task_id, None)
+        if tombstones:
+            self._tombstones.update(tombstones)
+            self._tombstone_mask = None
+        for offset, task in enumerate(tasks):
+            self._task_positions.setdefault(task['id'], []).append(first_position + offset)
+
+        self.tasks_data.extend(tasks)
+        keep_engine_index = self._engine_index is not None and self._engine_source is self.index
+        for _, _, row in journal:
+            self.index.add(row)
+            if keep_engine_index:
+                self._engine_index.add(row)
+        self._journal_rows += len(journal)
+        return tombstones
+
+    def _project_text(self, item: Dict[str, Any]) -> str:
+        """Text used to index a project context record."""
+        return f"{item.get('message', '')} {' '.join(item.get('files', []))}"
+
+    def _load_project_index(self) -> None:
+        """Load the project index, discarding it if it is out of date."""
+        self.project_vocabulary = {}
+        self.project_index = InvertedIndex()
+        if os.path.exists(self.project_index_file):
+            try:
+                saved = joblib.load(self.project_index_file)
+            except Exception as e:
+                # Treat an unreadable file as stale; the index is rebuilt on first use
+                print(f"Error loading project index, rebuilding it: {str(e)}")
+                return
+            if len(saved['index']) == len(self.projects_data):
+                self.project_vocabulary = saved['vocabulary']
+                self.project_index = saved['index']
+
+    def _save_project_index(self) -> None:
+        """Save the project index and its vocabulary."""
+        self._dump_atomic({
+            'vocabulary': self.project_vocabulary,
+            'index': self.project_index
+        }, self.project_index_file)
+
+    def _ensure_project_index(self) -> None:
+        """Index any project records that are not in the project index yet."""
+        if len(self.project_index) == len(self.projects_data):
+            return
+        with self._write_lock, self._index_lock:
+            # Another thread may have caught up while this one waited
+            if len(self.project_index) > len(self.projects_data):
+                self.project_vocabulary = {}
+                self.project_index = InvertedIndex()
+            if len(self.project_index) == len(self.projects_data):
+                return
+
+            texts = [self._project_text(item) for item in self.projects_data[len(self.project_index):]]
+            for tokens in self._preprocess_batch(texts):
+                row, _ = self._extend_vocabulary(tokens, self.project_vocabulary)
+                self.project_index.add(row)
+            self._save_project_index()
+
+    def _ensure_index(self) -> None:
+        """Rebuild the index if it does not cover every stored task."""
+        if len(self.index) == len(self.tasks_data):
+            return
+        with self._write_lock, self._index_lock:
+            if len(self.index) != len(self.tasks_data):
+                self._update_vectors()
 
     def add_task(self, task_id: int, content: str, metadata: Dict[str, Any]) -> None:
-        """Add a task to the vector store."""
-        self.tasks_data.append({
+        """Add a task to the vector store.
+
+        The task is tokenized once, its row is appended to the index and the
+        task and its journal row are committed in one transaction.
+        """
+        self._ensure_index()
+
+        task = {
             'id': task_id,
             'content': content,
             'metadata': metadata
-        })
-        self._save_json(self.tasks_file, self.tasks_data)
-        self._update_vectors()
+        }
+        self._append_tasks([task], [self._preprocess_text(content)])
+
+    def add_tasks(self, tasks: List[Dict[str, Any]]) -> None:
+        """Add many tasks in one pass and commit them in a single transaction.
+
+        Each task is a dict with 'id', 'content' and optional 'metadata'.
+        """
+        self._ensure_index()
+
+        token_lists = self._preprocess_batch([task['content'] for task in tasks])
+        self._append_tasks([
+            {
+                'id': task['id'],
+                'content': task['content'],
+                'metadata': task.get('metadata', {})
+            }
+            for task in tasks
+        ], token_lists)
+
+    def update_task(self, task_id: int, content: str, metadata: Dict[str, Any]) -> None:
+        """Replace a task's content and metadata, adding it if it is not stored.
+
+        The old entry is tombstoned in the same transaction that stores the
+        new one, so searches stop returning it immediately.
+        """
+        self.sync_tasks([{'id': task_id, 'content': content, 'metadata': metadata}])
+
+    def remove_task(self, task_id: int) -> bool:
+        """Tombstone a task so searches no longer return it.
+
+        Returns False if no task with that id is stored.
+        """
+        return self.sync_tasks([], [task_id]) > 0
+
+    def sync_tasks(self, tasks: List[Dict[str, Any]], removed_ids: Iterable[Any] = ()) -> int:
+        """Apply task creates, edits and deletes, e.g. from the task database.
+
+        Each task replaces any stored task with the same id and tasks in
+        ``removed_ids`` are removed; all in one transaction. Returns the
+        number of stored entries tombstoned.
+        """
+        self._ensure_index()
+
+        tasks = [
+            {'id': task['id'], 'content': task['content'], 'metadata': task.get('metadata', {})}
+            for task in tasks
+        ]
+        token_lists = self._preprocess_batch([task['content'] for task in tasks]) if tasks else []
+        return self._append_tasks(tasks, token_lists, set(removed_ids) | {task['id'] for task in tasks})
 
+    def rebuild_tasks(self, batches: Iterable[List[Dict[str, Any]]]) -> int:
+        """Replace every stored task with the given batches and rebuild the index.
+
+        Batches are tokenized, indexed and written to the store as they
+        stream in, so the source can be read a batch at a time. Searches keep
+        using the old index until the new one is swapped in. Returns the
+        number of tasks stored.
+        """
+        self.load()
+        vocabulary = {}
+        index = InvertedIndex()
+        tasks_data = []
+        pool = self._rebuild_pool()
+
+        def tasks():
+            for batch in batches:
+                token_lists = self._preprocess_batch([task['content'] for task in batch], pool)
+                for task, tokens in zip(batch, token_lists):
+                    row, _ = self._extend_vocabulary(tokens, vocabulary)
+                    index.add(row)
+                    task = {'id': task['id'], 'content': task['content'], 'metadata': task.get('metadata', {})}
+                    tasks_data.append(task)
+                    yield task
+
+        try:
+            with self._write_lock:
+                return self._replace_tasks(tasks(), tasks_data, vocabulary, index)
+        finally:
+            if pool:
+                pool.shutdown()
+
+    def compact_tasks(self) -> int:
+        """Drop tombstoned tasks from the store and the index.
+
+        Only writers wait: searches use the old index, which still filters
+        the tombstones, until the compacted one is swapped in. Returns the
+        number of entries dropped.
+        """
+        try:
+            with self._write_lock:
+                self._ensure_index()
+                tombstones = set(self._tombstones)
+                if not tombstones:
+                    return 0
+                keep = [position for position in range(len(self.tasks_data)) if position not in tombstones]
+                tasks_data = [self.tasks_data[position] for position in keep]
+                self._replace_tasks(iter(tasks_data), tasks_data, dict(self.vocabulary), self.index.subset(keep))
+                return len(tombstones)
+        finally:
+            self._compacting = False
+
+    def _compact_if_needed(self) -> None:
+        """Start compacting in the background once enough tasks are tombstoned."""
+        tombstones = len(self._tombstones)
+        if self._compacting or tombstones < self.COMPACT_MIN_TOMBSTONES or \
+                tombstones < self.COMPACT_TOMBSTONE_RATIO * len(self.tasks_data):
+            return
+        self._compacting = True
+        threading.Thread(target=self._compact_in_background, name='vector-store-compaction', daemon=True).start()
+
+    def _compact_in_background(self) -> None:
+        try:
+            self.compact_tasks()
+        except Exception as e:
+            print(f"Error compacting tasks: {str(e)}")
+
+    def _replace_tasks(self, records: Iterable[Dict[str, Any]], tasks_data: List[Dict[str, Any]],
+                       vocabulary: Dict[str, int], index: InvertedIndex) -> int:
+        """Store ``records`` as every task and swap in their index; needs the write lock.
+
+        ``tasks_data`` and ``index`` must hold the records once they have
+        been consumed. Returns the number of tasks stored.
+        """
+        # Without a snapshot a crash part-way leaves the index to be rebuilt from the records
+        for file_path in (self.index_file, self.vocab_file):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        count = self._storage.replace('task', records, clear_journal=True)
+        self._task_generation = self._storage.generation('task')
+
+        # Positions changed, so build the engine's index before readers switch over
+        engine_index = None if self.engine == 'inverted' else self._build_engine_index(index, vocabulary)
+        with self._index_lock:
+            self.tasks_data = tasks_data
+            self.vocabulary = vocabulary
+            self.index = index
+            self._tombstones = set()
+            self._tombstone_mask = None
+            self._task_positions = _positions_by_id(tasks_data)
+            self._engine_index, self._engine_source = engine_index, index if engine_index is not None else None
+        self._save_snapshot()
+        return count
+
+    @VECTOR_STORE_SECONDS.time(operation='find_similar_tasks')
     def find_similar_tasks(self, query: str, n_results: int = 5) -> List[Dict[str, Any]]:
         """Find similar tasks using binary term vectors."""
+        return self._search_tasks(self._preprocess_text(query), n_results)
+
+    def _task_engine(self):
+        """The index that scores tasks for the configured engine."""
+        if self.engine == 'inverted':
+            return self.index
+        if self._engine_source is not self.index or len(self._engine_index) != len(self.index):
+            self._engine_index = self._build_engine_index(self.index, self.vocabulary)
+            self._engine_source = self.index
+        return self._engine_index
+
+    def _build_engine_index(self, index: InvertedIndex, vocabulary: Dict[str, int]):
+        """Build the bitset or MinHash index from an inverted index."""
+        if self.engine == 'bitset':
+            return BitsetIndex.from_inverted_index(index, len(vocabulary))
+
+        # Reuse saved signatures of the current index and only hash tasks added since
+        minhash = None
+        if index is self.index:
+            minhash = MinHashIndex.load(self.minhash_file, self.minhash_bands, self.minhash_rows, vocabulary)
+        if minhash is None or len(minhash) > len(index):
+            minhash = MinHashIndex(self.minhash_bands, self.minhash_rows)
+        if len(minhash) < len(index):
+            minhash.add_rows(*index.rows(len(minhash)))
+            if index is self.index:
+                minhash.save(self.minhash_file, vocabulary)
+        return minhash
+
+    def _tombstones_to_exclude(self):
+        """Boolean mask of tombstoned positions, or None when there are none."""
+        if not self._tombstones:
+            return None
+        if self._tombstone_mask is None or len(self._tombstone_mask) != len(self.index):
+            mask = np.zeros(len(self.index), dtype=bool)
+            mask[[position for position in self._tombstones if position < len(mask)]] = True
+            self._tombstone_mask = mask
+        return self._tombstone_mask
+
+    def _search_tasks(self, tokens: List[str], n_results: int) -> List[Dict[str, Any]]:
+        """Find similar tasks, stored or scanned from markdown, for an already preprocessed query."""
+        self.refresh()
+        matches = self._search_task_index(tokens, n_results) + [
+            {
+                'id': match['id'],
+                'content': match['document'],
+                'metadata': match['metadata'],
+                'similarity': match['similarity']
+            }
+            for match in self.tasks_collection.search(tokens, n_results)
+        ]
+        return sorted(matches, key=lambda match: -match['similarity'])[:n_results]
+
+    def _search_task_index(self, tokens: List[str], n_results: int) -> List[Dict[str, Any]]:
+        """Find similar stored tasks for an already preprocessed query."""
         if not self.tasks_data:
             return []
 
         # Update vectors if needed
-        if self.vectors is None:
-            self._update_vectors()
+        self._ensure_index()
             
-        if not self.vocabulary:
-            return []
+        with self._index_lock:
+            if not self.vocabulary:
+                return []
 
-        # Get query vector
-        query_vector = self._text_to_vector(query)
-        
-        # Calculate similarities
-        similarities = self._compute_similarity(query_vector, self.vectors)
-        
-        # Get top N similar tasks
-        top_indices = np.argsort(similarities)[-n_results:][::-1]
+            # Score only the tasks that share terms with the query
+            matches = self._task_engine().search(
+                self._tokens_to_term_ids(tokens), n_results, exclude=self._tombstones_to_exclude()
+            )
         
-        return [
-            {
-                'id': self.tasks_data[idx]['id'],
-                'metadata': self.tasks_data[idx]['metadata'],
-                'similarity': float(similarities[idx])
-            }
-            for idx in top_indices
-            if similarities[idx] > 0
+            return [
+                {
+                    'id': self.tasks_data[idx]['id'],
+                    'content': self.tasks_data[idx]['content'],
+                    'metadata': self.tasks_data[idx]['metadata'],
+                    'similarity': similarity
+                }
+                for idx, similarity in matches
+                if similarity > 0
+            ]
+
+    def scan_git_project(self, repo_path: str, max_commits: int = 100, full_history: bool = False) -> int:
+        """Scan a Git repository for project context.
+
+        Only commits made since the last scan of the repo are ingested, at
+        most ``max_commits`` of them, newest first. ``full_history`` walks
+        the whole history instead, to backfill older commits. Commits already
+        stored are skipped by SHA. Returns the number of commits added.
+        """
+        result = self.scan_git_projects([repo_path], max_commits, full_history)[repo_path]
+        if result['error']:
+            print(f"Error scanning repository: {result['error']}")
+        return result['added']
+
+    def scan_git_projects(self, repo_paths: List[str], max_commits: int = 100, full_history: bool = False,
+                          workers: int = None, progress: Callable = None) -> Dict[str, Dict[str, Any]]:
+        """Scan many Git repositories, reading them in parallel worker processes.
+
+        Commit records from every repo are merged and de-duplicated here, then
+        projects.json, the project index and the scan state are each written
+        once. ``progress(repo_path, result, done, total)`` is called as each
+        repo finishes. Returns {'added', 'seconds', 'error'} per repo.
+        """
+        state = self._load_json(self.git_state_file, {})
+        jobs = [
+            (repo_path, state.get(os.path.abspath(repo_path), {}).get('head'), max_commits, full_history)
+            for repo_path in repo_paths
         ]
 
-    def scan_git_project(self, repo_path: str) -> None:
-        """Scan a Git repository for project context."""
+        if workers and workers > 1 and len(jobs) > 1:
+            executor = ProcessPoolExecutor(max_workers=workers)
+            futures = [executor.submit(_read_git_repo, *job) for job in jobs]
+            reads = (future.result() for future in as_completed(futures))
+        else:
+            executor = None
+            reads = (_read_git_repo(*job) for job in jobs)
+
+        known = {item['sha'] for item in self.projects_data if 'sha' in item}
+        # Records stored before SHAs were kept can only be matched by content
+        legacy = {_legacy_commit_key(item) for item in self.projects_data
+                  if item.get('type') == 'commit' and 'sha' not in item}
+        contexts = []
+        results = {}
         try:
-            import git
-            repo = git.Repo(repo_path)
-            
-            # Get recent commits
-            commits = list(repo.iter_commits('HEAD', max_count=100))
-            
-            # Extract commit messages and files
-            for commit in commits:
-                context = {
-                    'type': 'commit',
-                    'message': commit.message,
-                    'author': str(commit.author),
-                    'date': datetime.fromtimestamp(commit.committed_date).isoformat(),
-                    'files': [item.a_path for item in commit.diff(commit.parents[0])] if commit.parents else [],
-                    'repo': repo_path
-                }
-                self.projects_data.append(context)
-            
-            self._save_json(self.projects_file, self.projects_data)
-            self._update_vectors()
+            for read in reads:
+                added = 0
+                for context in read['commits']:
+                    if context['sha'] in known or (legacy and _legacy_commit_key(context) in legacy):
+                        continue
+                    known.add(context['sha'])
+                    contexts.append(context)
+                    added += 1
+                if read['head']:
+                    state[os.path.abspath(read['repo'])] = {
+                        'head': read['head'],
+                        'scanned_at': datetime.now().isoformat()
+                    }
 
-        except Exception as e:
-            print(f"Error scanning repository: {str(e)}")
+                result = {'added': added, 'seconds': read['seconds'], 'error': read['error']}
+                results[read['repo']] = result
+                if progress:
+                    progress(read['repo'], result, len(results), len(jobs))
+        finally:
+            if executor:
+                executor.shutdown(cancel_futures=True)
 
+        with self._write_lock:
+            # Drop commits another scan stored while the repos were being read
+            stored = {item['sha'] for item in self.projects_data if 'sha' in item}
+            contexts = [context for context in contexts if context['sha'] not in stored]
+            if contexts:
+                self._storage.add('project', len(self.projects_data), contexts)
+                with self._index_lock:
+                    self.projects_data.extend(contexts)
+                self._ensure_project_index()
+            self._save_json(self.git_state_file, state)
+        return results
+
+    @VECTOR_STORE_SECONDS.time(operation='get_project_context')
     def get_project_context(self, query: str, n_results: int = 5) -> List[Dict[str, Any]]:
         """Get relevant project context based on a query."""
+        return self._search_projects(self._preprocess_text(query), n_results)
+
+    def _search_projects(self, tokens: List[str], n_results: int) -> List[Dict[str, Any]]:
+        """Get project context, from git history and markdown files, for an already preprocessed query."""
+        self.refresh()
+        matches = self._search_project_index(tokens, n_results) + [
+            {
+                'context': dict(match['metadata'], content=match['document']),
+                'similarity': match['similarity']
+            }
+            for match in self.projects_collection.search(tokens, n_results)
+        ]
+        return sorted(matches, key=lambda match: -match['similarity'])[:n_results]
+
+    def _search_project_index(self, tokens: List[str], n_results: int) -> List[Dict[str, Any]]:
+        """Get git project context for an already preprocessed query."""
         if not self.projects_data:
             return []
 
-        # Get all project texts
-        texts = [
-            f"{item.get('message', '')} {' '.join(item.get('files', []))}"
-            for item in self.projects_data
-        ]
-        
-        # Build vocabulary and vectors for project texts
-        project_vocabulary = self._build_vocabulary(texts)
-        project_vectors = np.array([
-            self._text_to_vector(text) for text in texts
-        ])
-        
-        # Get query vector
-        query_vector = self._text_to_vector(query)
+        # Index is normally built at scan time; this only catches up stale data
+        self._ensure_project_index()
         
-        # Calculate similarities
-        similarities = self._compute_similarity(query_vector, project_vectors)
-        
-        # Get top N similar contexts
-        top_indices = np.argsort(similarities)[-n_results:][::-1]
+        with self._index_lock:
+            # Score the query against the project term space
+            matches = self.project_index.search(
+                self._tokens_to_term_ids(tokens, self.project_vocabulary), n_results
+            )
         
-        return [
-            {
-                'context': self.projects_data[idx],
-                'similarity': float(similarities[idx])
-            }
-            for idx in top_indices
-            if similarities[idx] > 0
-        ]
+            return [
+                {
+                    'context': self.projects_data[idx],
+                    'similarity': similarity
+                }
+                for idx, similarity in matches
+                if similarity > 0
+            ]
 
+    @VECTOR_STORE_SECONDS.time(operation='suggest_tags_from_context')
     def suggest_tags_from_context(self, content: str) -> List[str]:
         """Suggest tags based on project context and similar tasks."""
+        tokens = self._preprocess_text(content)
+        return self._tags_from_context(
+            self._search_tasks(tokens, 5),
+            self._search_projects(tokens, 5)
+        )
+
+    @VECTOR_STORE_SECONDS.time(operation='retrieve_context')
+    def retrieve_context(self, query: str, n_results: int = 5) -> Dict[str, Any]:
+        """Retrieve similar tasks, project context and suggested tags in one pass.
+
+        The query is preprocessed once and each index is searched once.
+        Stored copies of the query itself (the same text sent again) are
+        left out, so they neither feed the prompt nor change its cache key.
+        The returned 'timings' dict holds the seconds spent in each stage.
+        """
+        timings = {}
+
+        start = time.perf_counter()
+        tokens = self._preprocess_text(query)
+        timings['preprocess'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        # Ask for extra results to make up for copies of the query
+        similar_tasks = [
+            task for task in self._search_tasks(tokens, n_results * 2)
+            if not _is_copy_of(task, query)
+        ][:n_results]
+        timings['similar_tasks'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        project_context = self._search_projects(tokens, n_results)
+        timings['project_context'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        suggested_tags = self._tags_from_context(similar_tasks, project_context)
+        timings['suggested_tags'] = time.perf_counter() - start
+
+        return {
+            'similar_tasks': similar_tasks,
+            'project_context': project_context,
+            'suggested_tags': suggested_tags,
+            'timings': timings
+        }
+
+    def _tags_from_context(self, similar_tasks: List[Dict[str, Any]],
+                           project_context: List[Dict[str, Any]]) -> List[str]:
+        """Collect tags from similar tasks and project context results."""
         tags = set()
         
         # Get tags from similar tasks
-        similar_tasks = self.find_similar_tasks(content)
         for task in similar_tasks:
             if 'tags' in task['metadata']:
                 tags.update(task['metadata']['tags'])
         
         # Get tags from project context
-        project_context = self.get_project_context(content)
         for item in project_context:
             context = item['context']
             if isinstance(context, dict):
+                # Markdown files carry their own hashtags
+                tags.update(context.get('tags', []))
+
                 # Extract potential tags from commit messages and files
                 message = context.get('message', '').lower()
                 files = context.get('files', [])
@@ -244,15 +937,108 @@ class VectorStore:
         if not self.tasks_data:
             return
             
-        # Get all task contents
-        contents = [task['content'] for task in self.tasks_data]
+        # Preprocess all task contents in one batch
+        pool = self._rebuild_pool()
+        try:
+            token_lists = self._preprocess_batch([task['content'] for task in self.tasks_data], pool)
+        finally:
+            if pool:
+                pool.shutdown()
         
         # Build or update vocabulary
-        self.vocabulary = self._build_vocabulary(contents)
+        self.vocabulary = self._build_vocabulary(token_lists)
         
-        # Compute vectors for all tasks
-        self.vectors = np.array([
-            self._text_to_vector(content) for content in contents
-        ])
+        # Index the terms of every task
+        self.index = InvertedIndex()
+        for tokens in token_lists:
+            self.index.add(self.vocabulary[token] for token in tokens)
         
-        self._save_vectors()
+        try:
+            with self._storage.writing('task'):
+                self._save_snapshot()
+            self._index_matches_store = True
+        except RuntimeError:
+            # Another process writes tasks and keeps the snapshot; this one only reads
+            self._index_matches_store = False
+
+
+def _is_copy_of(task: Dict[str, Any], text: str) -> bool:
+    """Whether a stored task's content or raw input is the given text, ignoring case and spacing."""
+    normalized = ' '.join(text.split()).lower()
+    metadata = task.get('metadata') or {}
+    return any(
+        value and ' '.join(value.split()).lower() == normalized
+        for value in (task.get('content'), metadata.get('content'), metadata.get('raw_input'))
+    )
+
+
+def _positions_by_id(tasks: List[Dict[str, Any]], tombstones: Iterable[int] = ()) -> Dict[Any, List[int]]:
+    """Positions of the live tasks with each id."""
+    tombstones = set(tombstones)
+    positions = {}
+    for position, task in enumerate(tasks):
+        if position not in tombstones:
+            positions.setdefault(task['id'], []).append(position)
+    return positions
+
+
+def _legacy_commit_key(item: Dict[str, Any]) -> Tuple[str, str, str]:
+    """Identity of a commit record without a SHA: its repo, message and commit date."""
+    return os.path.abspath(item.get('repo', '')), item.get('message'), item.get('date')
+
+
+def _read_git_repo(repo_path: str, last_head: str = None, max_commits: int = 100,
+                   full_history: bool = False) -> Dict[str, Any]:
+    """Read new commit records from one repo; runs in a worker process when scanning in parallel."""
+    start = time.perf_counter()
+    result = {'repo': repo_path, 'head': None, 'commits': [], 'error': None}
+    try:
+        import git
+        repo = git.Repo(repo_path)
+        head = repo.head.commit.hexsha
+        if head != last_head or full_history:
+            revision = 'HEAD'
+            if last_head and not full_history and _is_ancestor(repo, last_head):
+                revision = f'{last_head}..HEAD'
+            result['commits'] = [
+                dict(context, repo=repo_path)
+                for context in _iter_git_log(repo, revision, None if full_history else max_commits)
+            ]
+        result['head'] = head
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def _is_ancestor(repo, sha: str) -> bool:
+    """Whether sha is still in HEAD's history (it may be gone after a rebase)."""
+    try:
+        return repo.is_ancestor(sha, 'HEAD')
+    except Exception:
+        return False
+
+
+def _iter_git_log(repo, revision: str, max_count: int = None):
+    """Yield commit contexts for a revision range from a single git log call.
+
+    Changed files come from --name-only in the same stream, diffed
+    against the first parent like commit.diff(commit.parents[0]).
+    """
+    args = [revision, '--name-only', '--diff-merges=first-parent',
+            '--format=%x1e%H%x1f%an%x1f%ct%x1f%B%x1f']
+    if max_count:
+        args.append(f'--max-count={max_count}')
+    repo.git.set_persistent_git_options(c='core.quotepath=off')
+    output = repo.git.log(*args)
+
+    for entry in output.split('\x1e')[1:]:
+        sha, author, committed, message, files = entry.split('\x1f', 4)
+        yield {
+            'type': 'commit',
+            'sha': sha,
+            'message': message,
+            'author': author,
+            'date': datetime.fromtimestamp(int(committed)).isoformat(),
+            'files': [line for line in files.splitlines() if line]
+        }
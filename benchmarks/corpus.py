@@ -0,0 +1,119 @@
+"""Synthetic tasks, git histories and markdown trees for the benchmarks.
+
+Everything is generated from a seed, so two runs with the same arguments
+produce the same corpus.
+"""
+import os
+import random
+import subprocess
+
+VERBS = ['fix', 'write', 'review', 'deploy', 'update', 'refactor', 'test', 'migrate', 'document',
+         'investigate', 'schedule', 'prepare', 'draft', 'clean', 'benchmark', 'release', 'merge']
+NOUNS = ['login', 'dashboard', 'api', 'database', 'pipeline', 'report', 'invoice', 'search', 'cache',
+         'scheduler', 'billing', 'onboarding', 'docs', 'tests', 'release', 'metrics', 'alerts',
+         'permissions', 'export', 'importer', 'tokenizer', 'index', 'webhook', 'settings', 'profile',
+         'budget', 'roadmap', 'contract', 'vendor', 'backlog', 'sprint', 'retro', 'design', 'mockups']
+QUALIFIERS = ['before friday', 'for the demo', 'after the outage', 'on staging', 'in production',
+              'with the team', 'for the client', 'next week', 'this sprint', 'asap', 'by eod']
+PROJECTS = ['website-redesign', 'mobile-app', 'data-platform', 'billing-service', 'infra',
+            'marketing-site', 'search', 'onboarding', 'analytics', 'internal-tools']
+TAGS = ['bug', 'feature', 'urgent', 'backend', 'frontend', 'ops', 'docs', 'research', 'security',
+        'performance', 'design', 'meeting']
+USERS = ['alice', 'bob', 'carol', 'dave', 'erin', 'frank', 'grace', 'heidi']
+PRIORITIES = ['high', 'medium', 'low']
+
+
+def _zipf_choice(rng, words):
+    """Pick a word with Zipf-like frequencies, like real task text."""
+    return rng.choices(words, weights=[1.0 / rank for rank in range(1, len(words) + 1)])[0]
+
+
+def task_text(rng):
+    """One natural-language task description."""
+    words = [_zipf_choice(rng, VERBS), 'the', _zipf_choice(rng, NOUNS)]
+    if rng.random() < 0.6:
+        words += ['and', _zipf_choice(rng, NOUNS)]
+    if rng.random() < 0.5:
+        words.append(rng.choice(QUALIFIERS))
+    if rng.random() < 0.4:
+        words.append(f"#{rng.choice(TAGS)}")
+    if rng.random() < 0.3:
+        words.append(f"@{rng.choice(USERS)}")
+    if rng.random() < 0.3:
+        words.append(f"for project {rng.choice(PROJECTS)}")
+    return ' '.join(words)
+
+
+def generate_tasks(n_tasks, seed=0, first_id=1):
+    """Task dicts as accepted by VectorStore.add_tasks."""
+    rng = random.Random(seed)
+    tasks = []
+    for task_id in range(first_id, first_id + n_tasks):
+        metadata = {'project': rng.choice(PROJECTS), 'priority': rng.choice(PRIORITIES),
+                    'tags': rng.sample(TAGS, rng.randint(0, 3))}
+        tasks.append({'id': task_id, 'content': task_text(rng), 'metadata': metadata})
+    return tasks
+
+
+def generate_git_repo(path, n_commits, seed=0, n_files=50):
+    """Create a repository with ``n_commits`` linear commits on main.
+
+    History is written with a single ``git fast-import`` so thousands of
+    commits take well under a second.
+    """
+    rng = random.Random(seed)
+    os.makedirs(path, exist_ok=True)
+    subprocess.run(['git', 'init', '-q', '-b', 'main', path], check=True)
+
+    files = [f"{rng.choice(['src', 'lib', 'docs', 'tests'])}/{rng.choice(NOUNS)}_{index}.py"
+             for index in range(n_files)]
+    timestamp = 1700000000
+    stream = []
+    for mark in range(1, n_commits + 1):
+        timestamp += rng.randint(60, 86400)
+        author = rng.choice(USERS)
+        message = f"{task_text(rng).capitalize()}\n\nProject: {rng.choice(PROJECTS)}\n".encode('utf-8')
+        stream.append(f"commit refs/heads/main\nmark :{mark}\n"
+                      f"author {author} <{author}@example.com> {timestamp} +0000\n"
+                      f"committer {author} <{author}@example.com> {timestamp} +0000\n"
+                      f"data {len(message)}\n".encode('utf-8') + message)
+        if mark > 1:
+            stream.append(f"from :{mark - 1}\n".encode('utf-8'))
+        for file_path in rng.sample(files, rng.randint(1, 4)):
+            content = f"# {task_text(rng)}\nVALUE = {rng.random()}\n".encode('utf-8')
+            stream.append(f"M 100644 inline {file_path}\ndata {len(content)}\n".encode('utf-8') + content)
+        stream.append(b"\n")
+
+    subprocess.run(['git', 'fast-import', '--quiet'], input=b''.join(stream), cwd=path, check=True)
+    subprocess.run(['git', 'checkout', '-q', '-f', 'main'], cwd=path, check=True)
+    return path
+
+
+def markdown_document(rng):
+    """A markdown note with frontmatter, sections and task items."""
+    lines = ['---', f"project: {rng.choice(PROJECTS)}", f"milestone: m{rng.randint(1, 9)}", '---',
+             f"# {task_text(rng).capitalize()}", '']
+    for _ in range(rng.randint(1, 4)):
+        lines += [f"## {_zipf_choice(rng, NOUNS).capitalize()}", '', task_text(rng) + '.', '']
+        for _ in range(rng.randint(1, 6)):
+            done = 'x' if rng.random() < 0.3 else ' '
+            line = f"- [{done}] {task_text(rng)}"
+            if rng.random() < 0.3:
+                line += f" due: 2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+            if rng.random() < 0.3:
+                line += f" priority: {rng.choice(PRIORITIES)}"
+            lines.append(line)
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def generate_markdown_tree(root, n_files, seed=0, files_per_directory=20):
+    """Write ``n_files`` markdown notes under ``root``, nested a few levels deep."""
+    rng = random.Random(seed)
+    for index in range(n_files):
+        directory = os.path.join(root, f"area{index // (files_per_directory * 5)}",
+                                 f"notes{index // files_per_directory}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"note{index}.md"), 'w', encoding='utf-8') as f:
+            f.write(markdown_document(rng))
+    return root
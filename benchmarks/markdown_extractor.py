@@ -0,0 +1,155 @@
+"""Compare the streaming markdown extractor with the original multi-pass parser.
+
+Usage: python -m benchmarks.markdown_extractor [--lines 200000] [--seed 0]
+
+Generates a large markdown file with frontmatter, headers, tasks, tags and
+mentions, parses it with both code paths and reports wall time and peak
+traced memory (which includes the parsed result) for each. Exits non-zero
+if the two parsers disagree.
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+import frontmatter
+from app.markdown_scanner import MarkdownScanner
+
+WORDS = ['review', 'deploy', 'draft', 'update', 'fix', 'meeting', 'budget', 'design',
+         'api', 'docs', 'release', 'billing', 'migration', 'dashboard', 'report']
+TASK_SUFFIXES = ['', ' due: 2024-05-01', ' priority: high', ' project: alpha', ' milestone: m2',
+                 ' #backend', ' @sam', ' due: tomorrow priority: low #ops @kim']
+
+
+def generate_markdown(path, lines, seed=0):
+    """Write a markdown file of roughly the given number of lines."""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("---\ntitle: Generated notes\ntags: [bench, markdown]\n---\n\n")
+        for i in range(lines):
+            roll = rng.random()
+            words = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 10)))
+            if roll < 0.02:
+                f.write(f"{'#' * rng.randint(1, 3)} Section {i} {words}\n")
+            elif roll < 0.40:
+                mark = 'x' if rng.random() < 0.3 else ' '
+                f.write(f"- [{mark}] {words}{rng.choice(TASK_SUFFIXES)}\n")
+            elif roll < 0.50:
+                f.write(f"Notes on {words} #{rng.choice(WORDS)} with @{rng.choice(WORDS)}\n")
+            elif roll < 0.60:
+                f.write("\n")
+            else:
+                f.write(f"{words}.\n")
+
+
+def parse_multipass(file_path, patterns):
+    """Original whole-file, multi-pass parser; the reference the extractor must match."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        post = frontmatter.load(f)
+    content = post.content
+
+    return {
+        'file_path': file_path,
+        'filename': os.path.basename(file_path),
+        'last_modified': datetime.fromtimestamp(os.path.getmtime(file_path)).isoformat(),
+        'frontmatter': post.metadata,
+        'headers': extract_headers(content, patterns),
+        'tasks': extract_tasks(content, patterns),
+        'tags': re.findall(patterns['tag'], content),
+        'mentions': re.findall(patterns['mention'], content)
+    }
+
+
+def extract_headers(content, patterns):
+    """Extract markdown headers."""
+    headers = []
+    for line in content.split('\n'):
+        match = re.match(patterns['header'], line)
+        if match:
+            headers.append(match.group(1))
+    return headers
+
+
+def extract_tasks(content, patterns):
+    """Extract tasks and their metadata from markdown content."""
+    tasks = []
+    current_section = None
+
+    for line in content.split('\n'):
+        # Track current section
+        header_match = re.match(patterns['header'], line)
+        if header_match:
+            current_section = header_match.group(1)
+            continue
+
+        task_match = re.match(patterns['task'], line)
+        if task_match:
+            task_content = task_match.group(2)
+            tasks.append({
+                'content': task_content,
+                'status': 'completed' if task_match.group(1) == 'x' else 'pending',
+                'section': current_section,
+                'due_date': extract_pattern(task_content, patterns['due_date']),
+                'priority': extract_pattern(task_content, patterns['priority']),
+                'project': extract_pattern(task_content, patterns['project']),
+                'milestone': extract_pattern(task_content, patterns['milestone']),
+                'tags': re.findall(patterns['tag'], task_content),
+                'mentions': re.findall(patterns['mention'], task_content)
+            })
+
+    return tasks
+
+
+def extract_pattern(content, pattern):
+    """First group of a case-insensitive pattern match, or None."""
+    match = re.search(pattern, content, re.IGNORECASE)
+    return match.group(1) if match else None
+
+
+def measure(parse, path):
+    """Time one parse, then repeat it under tracemalloc for the memory peak."""
+    start = time.perf_counter()
+    result = parse(path)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    parse(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def main(argv):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--lines', type=int, default=200000, help='lines in the generated file')
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args(argv)
+
+    scanner = MarkdownScanner(None)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'large.md')
+        generate_markdown(path, args.lines, args.seed)
+        size_mb = os.path.getsize(path) / 1e6
+
+        expected, multipass_seconds, multipass_peak = measure(
+            lambda file_path: parse_multipass(file_path, scanner.patterns), path
+        )
+        actual, streaming_seconds, streaming_peak = measure(scanner._parse_markdown_file, path)
+
+    print(f"{args.lines} lines ({size_mb:.1f} MB), {len(expected['tasks'])} tasks")
+    print(f"multi-pass: {multipass_seconds:.3f}s  peak {multipass_peak / 1e6:.1f} MB")
+    print(f"streaming:  {streaming_seconds:.3f}s  peak {streaming_peak / 1e6:.1f} MB "
+          f"({multipass_seconds / streaming_seconds:.1f}x faster)")
+
+    if actual != expected:
+        print("MISMATCH: streaming extractor output differs from the multi-pass parser")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,86 @@
+"""Measure MinHash/LSH recall and latency against the exact inverted index.
+
+Usage: python -m benchmarks.minhash_recall [--size 100000] [--vocabulary 2000]
+       [--terms 8] [--queries 200] [--configs 8x8 16x4 32x2 64x1]
+
+Queries are existing tasks with one term swapped for another, the way a
+reworded duplicate task looks. For each bands x rows setting, reports
+recall@5 against InvertedIndex.search, the mean number of candidates
+re-ranked and the per-query time. Exits non-zero if a MinHash result's
+score differs from the exact score of that task.
+"""
+import argparse
+import sys
+import time
+import numpy as np
+from app.inverted_index import InvertedIndex
+from app.minhash_index import MinHashIndex
+from benchmarks.similarity_kernels import generate_rows, time_per_query, zipf_weights
+
+
+def perturb(row, n_terms, rng):
+    """Replace one term of a task with a random one."""
+    row = list(dict.fromkeys(int(term_id) for term_id in row))
+    row[rng.integers(len(row))] = int(rng.choice(n_terms, p=zipf_weights(n_terms)))
+    return row
+
+
+def cosine(query, row):
+    """Binary cosine similarity of two term id sets."""
+    query, row = set(int(term_id) for term_id in query), set(int(term_id) for term_id in row)
+    return len(query & row) / (np.sqrt(len(row)) * np.sqrt(len(query)))
+
+
+def main(argv):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--size', type=int, default=100000)
+    arg_parser.add_argument('--vocabulary', type=int, default=2000)
+    arg_parser.add_argument('--terms', type=int, default=8, help='average terms per task')
+    arg_parser.add_argument('--queries', type=int, default=200)
+    arg_parser.add_argument('--configs', nargs='+', default=['8x8', '16x4', '32x2', '64x1'],
+                            help='BANDSxROWS settings to compare')
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    rows = generate_rows(args.size, args.vocabulary, args.terms, rng)
+    inverted = InvertedIndex()
+    for row in rows:
+        inverted.add(row)
+    queries = [perturb(rows[doc], args.vocabulary, rng) for doc in rng.integers(args.size, size=args.queries)]
+    exact_ms, exact_results = time_per_query(lambda query: inverted.search(query, 5), queries)
+
+    print(f"{args.size} tasks, {args.queries} queries; exact search {exact_ms:.2f} ms/query")
+    print(f"{'bands x rows':>12} {'recall@5':>9} {'candidates':>11} {'ms':>8} {'build s':>8}")
+
+    failures = 0
+    indptr, terms = inverted.rows()
+    for config in args.configs:
+        bands, band_rows = (int(value) for value in config.split('x'))
+        start = time.perf_counter()
+        minhash = MinHashIndex(bands, band_rows)
+        minhash.add_rows(indptr, terms)
+        minhash.candidates(queries[0])
+        build_seconds = time.perf_counter() - start
+
+        minhash_ms, minhash_results = time_per_query(lambda query: minhash.search(query, 5), queries)
+        candidates = np.mean([len(minhash.candidates(query)) for query in queries])
+
+        found = expected = 0
+        for query, exact, approximate in zip(queries, exact_results, minhash_results):
+            # Count ties at the cut-off as hits: any of them is a correct answer
+            cutoff = exact[-1][1] if exact else 0
+            found += sum(1 for _, score in approximate if score >= cutoff - 1e-12)
+            expected += len(exact)
+            if any(abs(cosine(query, rows[doc]) - score) > 1e-12 for doc, score in approximate):
+                failures += 1
+        recall = found / expected if expected else 1.0
+        print(f"{config:>12} {recall:9.3f} {candidates:11.0f} {minhash_ms:8.2f} {build_seconds:8.2f}")
+
+    if failures:
+        print(f"MISMATCH: {failures} queries returned scores that differ from the exact engine")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
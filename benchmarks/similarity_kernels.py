@@ -0,0 +1,111 @@
+"""Microbenchmark the task similarity kernels on synthetic binary term vectors.
+
+Usage: python -m benchmarks.similarity_kernels [--sizes 10000 100000 1000000]
+       [--vocabulary 2000] [--terms 8] [--queries 50] [--max-dense-mb 2048]
+
+For each corpus size, times per-query scoring with the dense float64
+reference (dense_similarity), the packed bitset kernel and
+the inverted index. The dense reference is skipped when its matrix would
+exceed --max-dense-mb. Exits non-zero if the bitset kernel's scores differ
+from the dense reference or its rankings differ from the inverted index.
+"""
+import argparse
+import sys
+import time
+import numpy as np
+from app.bitset_index import BitsetIndex
+from app.inverted_index import InvertedIndex
+
+
+def zipf_weights(n_terms):
+    """Zipf-like term frequencies, like real task text."""
+    weights = 1.0 / np.arange(1, n_terms + 1)
+    return weights / weights.sum()
+
+
+def generate_rows(n_docs, n_terms, terms_per_doc, rng):
+    """Random term id sets drawn with Zipf-like frequencies."""
+    weights = zipf_weights(n_terms)
+    lengths = rng.integers(1, 2 * terms_per_doc, size=n_docs)
+    flat = rng.choice(n_terms, size=int(lengths.sum()), p=weights)
+    return np.split(flat, np.cumsum(lengths)[:-1])
+
+
+def dense_similarity(query_vector, vectors):
+    """Cosine similarity of a query against every row of a dense matrix.
+
+    The original VectorStore scoring, kept as the reference the faster
+    kernels must agree with.
+    """
+    # Add small epsilon to avoid division by zero
+    epsilon = 1e-8
+    return np.dot(vectors, query_vector) / (
+        np.maximum(
+            np.linalg.norm(vectors, axis=1) * np.linalg.norm(query_vector),
+            epsilon
+        )
+    )
+
+
+def time_per_query(score, queries):
+    start = time.perf_counter()
+    results = [score(query) for query in queries]
+    return (time.perf_counter() - start) / len(queries) * 1000, results
+
+
+def main(argv):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    arg_parser.add_argument('--vocabulary', type=int, default=2000)
+    arg_parser.add_argument('--terms', type=int, default=8, help='average terms per task')
+    arg_parser.add_argument('--queries', type=int, default=50)
+    arg_parser.add_argument('--max-dense-mb', type=float, default=2048)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    print(f"popcount: {'np.bitwise_count' if hasattr(np, 'bitwise_count') else 'byte lookup table'}")
+    print(f"{'tasks':>9} {'dense ms':>10} {'bitset ms':>10} {'inverted ms':>12} {'bitset speedup':>15}")
+
+    failures = 0
+    for size in args.sizes:
+        rows = generate_rows(size, args.vocabulary, args.terms, rng)
+        queries = [rng.choice(args.vocabulary, size=5, replace=False, p=zipf_weights(args.vocabulary))
+                   for _ in range(args.queries)]
+
+        inverted = InvertedIndex()
+        for row in rows:
+            inverted.add(row)
+        bitset = BitsetIndex.from_inverted_index(inverted, args.vocabulary)
+
+        dense_ms = None
+        if size * args.vocabulary * 8 / 1e6 <= args.max_dense_mb:
+            vectors = inverted.to_matrix(args.vocabulary)
+
+            def dense_score(query):
+                query_vector = np.zeros(args.vocabulary)
+                query_vector[query] = 1
+                return dense_similarity(query_vector, vectors)
+
+            dense_ms, dense_scores = time_per_query(dense_score, queries)
+            bitset_scores = [bitset.scores(query) for query in queries]
+            if not all(np.array_equal(a, b) for a, b in zip(dense_scores, bitset_scores)):
+                print(f"MISMATCH at {size}: bitset scores differ from dense_similarity")
+                failures += 1
+            del vectors
+
+        bitset_ms, bitset_results = time_per_query(lambda query: bitset.search(query, 5), queries)
+        inverted_ms, inverted_results = time_per_query(lambda query: inverted.search(query, 5), queries)
+        if bitset_results != inverted_results:
+            print(f"MISMATCH at {size}: bitset rankings differ from the inverted index")
+            failures += 1
+
+        dense_column = f"{dense_ms:10.2f}" if dense_ms is not None else f"{'skipped':>10}"
+        speedup = f"{dense_ms / bitset_ms:14.1f}x" if dense_ms is not None else f"{'-':>15}"
+        print(f"{size:>9} {dense_column} {bitset_ms:10.2f} {inverted_ms:12.2f} {speedup}")
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
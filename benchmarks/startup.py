@@ -0,0 +1,43 @@
+"""Measure app startup time against the startup budget.
+
+Usage: python -m benchmarks.startup [--budget-ms 500]
+
+Run from the directory holding config.toml. Reports the time to import the
+app and run create_app, then the time to build the NLP processor and warm
+the vector store, which the app now defers to the first request. Exits
+non-zero if create_app exceeds the budget.
+"""
+import argparse
+import sys
+import time
+
+
+def main(argv):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--budget-ms', type=float, default=500.0,
+                            help='maximum allowed import + create_app time')
+    args = arg_parser.parse_args(argv)
+
+    start = time.perf_counter()
+    from app import create_app
+    app = create_app()
+    startup_ms = (time.perf_counter() - start) * 1000
+
+    from app.routes import get_nlp
+    start = time.perf_counter()
+    nlp = get_nlp()
+    construct_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    nlp.warm()
+    warm_ms = (time.perf_counter() - start) * 1000
+
+    print(f"import + create_app: {startup_ms:.1f}ms "
+          f"(create_app alone {app.config['STARTUP_SECONDS'] * 1000:.1f}ms, budget {args.budget_ms:.0f}ms)")
+    print(f"NLPProcessor():      {construct_ms:.1f}ms")
+    print(f"vector store warm:   {warm_ms:.1f}ms")
+    return 1 if startup_ms > args.budget_ms else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
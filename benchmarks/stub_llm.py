@@ -0,0 +1,49 @@
+"""Deterministic stand-in for the LLM provider, so benchmarks run offline."""
+import hashlib
+import json
+import re
+import time
+
+from benchmarks.corpus import PRIORITIES, PROJECTS
+
+TASK_PATTERN = re.compile(r'^\s*Task: (.*)$', re.MULTILINE)
+SUGGESTED_TAGS_PATTERN = re.compile(r'^\s*Suggested tags based on project context: (.*)$', re.MULTILINE)
+
+
+class StubLLM:
+    """Answer process_task prompts with JSON derived only from the prompt.
+
+    Install with ``nlp._call_llm = StubLLM(latency_seconds)``. Each call
+    sleeps ``latency_seconds`` to stand in for the provider round trip, so
+    the same prompt always gets the same answer in roughly the same time.
+    """
+
+    def __init__(self, latency_seconds: float = 0.0):
+        self.latency_seconds = latency_seconds
+        self.calls = 0
+
+    def __call__(self, prompt: str) -> str:
+        self.calls += 1
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+
+        task_match = TASK_PATTERN.search(prompt)
+        text = task_match.group(1).strip() if task_match else ''
+        digest = int(hashlib.sha1(text.encode('utf-8')).hexdigest(), 16)
+
+        tags = re.findall(r'#([\w-]+)', text)
+        suggested = SUGGESTED_TAGS_PATTERN.search(prompt)
+        if suggested:
+            tags += [tag.strip() for tag in suggested.group(1).split(',')]
+        project = next((name for name in PROJECTS if name in text), None)
+
+        return json.dumps({
+            'task_content': text,
+            'due_date': f"2024-{digest % 12 + 1:02d}-{digest % 28 + 1:02d}" if digest % 3 == 0 else None,
+            'project': project,
+            'milestone': None,
+            'priority': PRIORITIES[digest % len(PRIORITIES)],
+            'status': 'pending',
+            'tags': list(dict.fromkeys(tags)),
+            'assigned_users': re.findall(r'@(\w+)', text)
+        })
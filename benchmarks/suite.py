@@ -0,0 +1,245 @@
+"""Benchmark retrieval, ingestion, scanning and the request path offline.
+
+Usage: python -m benchmarks.suite [--tasks 5000] [--repos 4] [--commits 500]
+       [--markdown-files 500] [--llm-latency-ms 20] [--output results.json]
+       [--baseline baseline.json] [--tolerance 0.25]
+
+Builds a synthetic corpus (tasks, git repositories and a markdown tree) in a
+scratch directory with its own config.toml and database, replaces the LLM
+client with benchmarks.stub_llm.StubLLM, and times VectorStore, the
+MarkdownScanner and the /process_task and /tasks routes. Results are
+written as JSON. With --baseline, each timing's median is compared against
+the baseline's and the run exits non-zero if any is more than --tolerance
+slower.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+import numpy as np
+import toml
+from benchmarks.corpus import (generate_git_repo, generate_markdown_tree, generate_tasks,
+                               task_text)
+from benchmarks.stub_llm import StubLLM
+
+
+class Recorder:
+    """Collect per-call timings under a name."""
+
+    def __init__(self):
+        self.samples = {}
+
+    def time(self, name, function, *args, **kwargs):
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        self.samples.setdefault(name, []).append(time.perf_counter() - start)
+        return result
+
+    def summary(self):
+        results = {}
+        for name, samples in self.samples.items():
+            milliseconds = np.array(samples) * 1000
+            results[name] = {
+                'count': len(samples),
+                'mean_ms': float(milliseconds.mean()),
+                'p50_ms': float(np.percentile(milliseconds, 50)),
+                'p95_ms': float(np.percentile(milliseconds, 95)),
+                'min_ms': float(milliseconds.min()),
+                'max_ms': float(milliseconds.max())
+            }
+        return results
+
+
+def write_config(workdir, args):
+    config = {
+        'app': {'secret_key': 'benchmark', 'database_url': f"sqlite:///{os.path.join(workdir, 'tasks.sqlite')}"},
+        'llm': {'provider': 'stub'},
+        'vector_store': {'tokenizer': args.tokenizer, 'engine': args.engine},
+        'git': {'max_commits': args.commits},
+        # Every request must reach the stub, or later runs would only time cache hits
+        'cache': {'enabled': False}
+    }
+    with open(os.path.join(workdir, 'config.toml'), 'w') as f:
+        toml.dump(config, f)
+
+
+def bench_vector_store(recorder, nlp, args, repos, markdown_root):
+    from app.markdown_scanner import MarkdownScanner
+    vector_store = nlp.vector_store
+    recorder.time('load', vector_store.load)
+    recorder.time('add_tasks', vector_store.add_tasks, generate_tasks(args.tasks, seed=args.seed))
+    added = generate_tasks(args.add_tasks, seed=args.seed + 1, first_id=args.tasks + 1)
+    for task in added:
+        recorder.time('add_task', vector_store.add_task, task['id'], task['content'], task['metadata'])
+    for task in generate_tasks(args.add_tasks, seed=args.seed + 4, first_id=args.tasks + 1):
+        recorder.time('update_task', vector_store.update_task, task['id'], task['content'], task['metadata'])
+    for task in added[::2]:
+        recorder.time('remove_task', vector_store.remove_task, task['id'])
+
+    for repo in repos:
+        recorder.time('scan_git_project', nlp.scan_project, repo)
+    for repo in repos:
+        recorder.time('scan_git_project.unchanged', nlp.scan_project, repo)
+
+    scanner = MarkdownScanner(vector_store)
+    recorder.time('scan_markdown_directory', scanner.scan_markdown_directory, markdown_root)
+    for _ in range(args.repeat):
+        recorder.time('scan_markdown_directory.unchanged', scanner.scan_markdown_directory, markdown_root)
+
+    rng = random.Random(args.seed + 2)
+    queries = [task_text(rng) for _ in range(args.queries)]
+    for query in queries:
+        recorder.time('find_similar_tasks', vector_store.find_similar_tasks, query)
+    for query in queries:
+        recorder.time('get_project_context', vector_store.get_project_context, query)
+    for query in queries:
+        recorder.time('suggest_tags_from_context', vector_store.suggest_tags_from_context, query)
+
+
+def bench_routes(recorder, nlp, args):
+    from app import create_app, db
+    from app import indexer, routes
+    from app.models import Task, User
+
+    app = create_app()
+    routes._nlp = nlp
+    rng = random.Random(args.seed + 3)
+    with app.app_context():
+        db.session.add(User(username='test', email='test@example.com'))
+        created_at = datetime(2024, 1, 1)
+        db.session.add_all(
+            Task(content=text, raw_input=text, user_id=1, status=rng.choice(['pending', 'done']),
+                 priority=rng.choice(['high', 'medium', 'low']), created_at=created_at + timedelta(minutes=index))
+            for index, text in enumerate(task_text(rng) for _ in range(args.db_tasks))
+        )
+        db.session.commit()
+    # Let the background indexer catch up so its work is not timed with the requests
+    if indexer.task_indexer:
+        indexer.task_indexer.flush()
+
+    client = app.test_client()
+    for _ in range(args.requests):
+        response = recorder.time('POST /process_task', client.post, '/process_task',
+                                 json={'task_description': task_text(rng)})
+        if response.status_code != 200:
+            raise RuntimeError(f"/process_task returned {response.status_code}: {response.get_data(as_text=True)}")
+    if indexer.task_indexer:
+        indexer.task_indexer.flush()
+
+    headers = {'X-Requested-With': 'XMLHttpRequest'}
+    for _ in range(args.repeat):
+        url = '/tasks?limit=50'
+        while url:
+            page = recorder.time('GET /tasks', client.get, url, headers=headers).get_json()
+            url = f"/tasks?limit=50&cursor={page['next_cursor']}" if page['next_cursor'] else None
+    for _ in range(args.requests):
+        recorder.time('GET /tasks?status=pending', client.get, '/tasks?status=pending&limit=50', headers=headers)
+
+
+def run(args):
+    workdir = os.path.abspath(args.workdir) if args.workdir else tempfile.mkdtemp(prefix='promptodo-bench-')
+    os.makedirs(workdir, exist_ok=True)
+    cwd = os.getcwd()
+    try:
+        write_config(workdir, args)
+        repos = [generate_git_repo(os.path.join(workdir, 'repos', f"repo{index}"), args.commits, seed=args.seed + index)
+                 for index in range(args.repos)]
+        markdown_root = generate_markdown_tree(os.path.join(workdir, 'notes'), args.markdown_files, seed=args.seed)
+
+        # NLPProcessor and create_app read config.toml from the working directory
+        os.chdir(workdir)
+        from app.nlp_processor import NLPProcessor
+        nlp = NLPProcessor()
+        nlp.model = 'stub'
+        nlp._call_llm = StubLLM(args.llm_latency_ms / 1000)
+
+        recorder = Recorder()
+        bench_vector_store(recorder, nlp, args, repos, markdown_root)
+        bench_routes(recorder, nlp, args)
+        return recorder.summary()
+    finally:
+        os.chdir(cwd)
+        if not args.workdir and not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare(results, baseline, tolerance):
+    """Print median timings against the baseline; return the names that regressed."""
+    regressions = []
+    print(f"{'benchmark':<36} {'baseline ms':>12} {'current ms':>12} {'ratio':>7}")
+    for name, stats in results.items():
+        if name not in baseline:
+            print(f"{name:<36} {'-':>12} {stats['p50_ms']:12.3f} {'new':>7}")
+            continue
+        before = baseline[name]['p50_ms']
+        ratio = stats['p50_ms'] / before if before else float('inf')
+        flag = ''
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<36} {before:12.3f} {stats['p50_ms']:12.3f} {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def main(argv):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--tasks', type=int, default=5000, help='tasks bulk-loaded into the vector store')
+    arg_parser.add_argument('--add-tasks', type=int, default=200, help='tasks then added one at a time')
+    arg_parser.add_argument('--queries', type=int, default=200)
+    arg_parser.add_argument('--repos', type=int, default=4)
+    arg_parser.add_argument('--commits', type=int, default=500, help='commits per repository')
+    arg_parser.add_argument('--markdown-files', type=int, default=500)
+    arg_parser.add_argument('--db-tasks', type=int, default=2000, help='tasks in the database for /tasks')
+    arg_parser.add_argument('--requests', type=int, default=50, help='requests per route')
+    arg_parser.add_argument('--repeat', type=int, default=5, help='repetitions of whole-tree scans and task listings')
+    arg_parser.add_argument('--llm-latency-ms', type=float, default=20.0, help='stub LLM latency per call')
+    # NLTK needs corpus downloads, so the offline default is the regex tokenizer
+    arg_parser.add_argument('--tokenizer', default='regex')
+    arg_parser.add_argument('--engine', default='inverted')
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--workdir', help='directory for the corpus and stores (default: a removed temp dir)')
+    arg_parser.add_argument('--keep', action='store_true', help='keep the temporary directory')
+    arg_parser.add_argument('--output', help='write results JSON here (default: stdout)')
+    arg_parser.add_argument('--baseline', help='results JSON of an earlier run to compare against')
+    arg_parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='allowed median slowdown against the baseline, as a fraction')
+    args = arg_parser.parse_args(argv)
+
+    workload = {name: value for name, value in vars(args).items()
+                if name not in ('workdir', 'keep', 'output', 'baseline', 'tolerance')}
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'workload': workload,
+        'results': run(args)
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {len(report['results'])} results to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get('workload') != workload:
+        print("Warning: the baseline was recorded with a different workload")
+    regressions = compare(report['results'], baseline['results'], args.tolerance)
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) slower than the baseline by more than {args.tolerance:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
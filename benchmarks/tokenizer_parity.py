@@ -0,0 +1,88 @@
+"""Check that the regex tokenizer produces the same token sets as NLTK.
+
+Usage: python -m benchmarks.tokenizer_parity [corpus.txt ...]
+
+Each line of a corpus file is treated as one text. Without arguments a
+built-in reference corpus of task-style sentences is used. Exits non-zero
+and prints the differing tokens if any text disagrees.
+"""
+import sys
+import time
+from app.tokenizer import get_tokenizer
+
+REFERENCE_CORPUS = [
+    "Fix the login bug on the dashboard before Friday's release.",
+    "Don't forget to email John about the Q2 review @john #project-alpha",
+    "Can't deploy v1.2.3 to prod; the CI pipeline (build #42) is failing.",
+    "Write docs for the e-mail integration, e.g. SMTP/IMAP settings.",
+    "Meeting at 10:30 with Sarah -- discuss budget of $1,000,000 and 3.5% growth!",
+    "\"Quoted\" text and 'single quotes' should work, shouldn't they?",
+    "Refactor user_service.py and update README.md",
+    "We're gonna need it by tomorrow; I'll check in w/ the team.",
+    "Priority: high, due: 2024-05-01, project: website-redesign",
+    "Review PR #123 (https://github.com/org/repo/pull/123) ASAP...",
+    "It's 5 o'clock somewhere, y'all, and rock'n'roll isn't dead",
+    "Cannot reproduce the issue on macOS 14.1 but it fails on Ubuntu 22.04",
+    "Update the API docs [draft] {internal} <urgent> and ping @ops-team",
+    "Numbers like 1,5 and 2:3 and a,b plus c:d or x, y: z",
+    "End with a period. Then another sentence. And one more.",
+    "Café résumé naïve façade über straße",
+    "Tabs\tand  multiple   spaces",
+    "'Twas the night before release and we wanna ship",
+    "x+y=z and a^b and c|d and e~f",
+    "snake_case and kebab-case and camelCase and PascalCase",
+    "100% done & 50% left; *emphasis* and **bold**",
+    "O'Neil's report isn't ready; the dogs' bowls are.",
+    "Prepare Q3 OKRs for the platform team and share with leadership",
+    "Migrate the billing service to Postgres 16 (see ticket OPS-2211)",
+    "Call the vendor re: contract renewal - they'd asked for a quote",
+    "Draft blog post: 'How we cut build times by 40%'",
+    "Schedule 1:1s with new hires next week",
+    "Clean up feature flags older than 90 days",
+    "Pair with @maria on the flaky integration tests #testing #ci",
+    "Book travel to Berlin for the conference, Mar 12-14",
+    "Nobody said they wanna. Do you wanna, or are you a wanna-be?",
+]
+
+
+def check(texts):
+    reference = get_tokenizer('nltk')
+    fast = get_tokenizer('regex')
+
+    mismatches = []
+    for text in texts:
+        expected = set(reference.preprocess(text))
+        actual = set(fast.preprocess(text))
+        if expected != actual:
+            mismatches.append((text, expected - actual, actual - expected))
+
+    start = time.perf_counter()
+    reference.preprocess_batch(texts)
+    reference_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fast.preprocess_batch(texts)
+    fast_seconds = time.perf_counter() - start
+
+    return mismatches, reference_seconds, fast_seconds
+
+
+def main(paths):
+    texts = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            texts.extend(line.rstrip('\n') for line in f if line.strip())
+    if not texts:
+        texts = REFERENCE_CORPUS
+
+    mismatches, reference_seconds, fast_seconds = check(texts)
+    for text, missing, extra in mismatches:
+        print(f"MISMATCH {text!r}: missing={sorted(missing)} extra={sorted(extra)}")
+
+    print(f"{len(texts) - len(mismatches)}/{len(texts)} texts match")
+    print(f"nltk: {reference_seconds:.4f}s  regex: {fast_seconds:.4f}s")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
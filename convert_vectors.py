@@ -0,0 +1,16 @@
+import argparse
+from app.vector_store import VectorStore
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Convert a dense vectors.joblib snapshot into the compact memory-mapped index."
+    )
+    parser.add_argument('directory', nargs='?', default='vector_db',
+                        help='vector store directory (default: vector_db)')
+    args = parser.parse_args()
+
+    vector_store = VectorStore(args.directory)
+    if vector_store.convert_legacy_vectors():
+        print(f"Converted {vector_store.vectors_file} to {vector_store.index_file}")
+    else:
+        print(f"Nothing to convert in {args.directory}")
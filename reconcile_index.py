@@ -0,0 +1,33 @@
+import argparse
+import time
+import toml
+from app import create_app
+from app.indexer import iter_task_batches
+from app.vector_store import VectorStore
+
+def reconcile_index(batch_size=500):
+    """Rebuild the vector store's tasks from the Task table."""
+    vector_store = VectorStore.from_config(toml.load('config.toml'))
+
+    def progress(batches):
+        done = 0
+        for batch in batches:
+            done += len(batch)
+            print(f"Read {done} tasks")
+            yield batch
+
+    app = create_app()
+    start = time.perf_counter()
+    with app.app_context():
+        count = vector_store.rebuild_tasks(progress(iter_task_batches(batch_size)))
+    print(f"Rebuilt the task index from {count} tasks in {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Rebuild the vector store's task index from the database. Run it while the app is stopped."
+    )
+    parser.add_argument('--batch-size', type=int, default=500,
+                        help='tasks read from the database per query (default: 500)')
+    args = parser.parse_args()
+
+    reconcile_index(batch_size=args.batch_size)
@@ -1,5 +1,8 @@
+import logging
 from app import create_app
 
+logging.basicConfig(level=logging.INFO)
+
 app = create_app()
 
 if __name__ == '__main__':
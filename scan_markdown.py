@@ -1,27 +1,33 @@
-import sys
+import argparse
 import os
+import toml
 from app.vector_store import VectorStore
 from app.markdown_scanner import MarkdownScanner
 
-def scan_markdown_directories(directories):
+def scan_markdown_directories(directories, workers=None, chunk_size=100, full=False,
+                              watch=False, interval=2.0):
     """Scan provided directories for markdown files and extract context."""
-    vector_store = VectorStore()
+    config = toml.load('config.toml') if os.path.exists('config.toml') else {}
+    vector_store = VectorStore.from_config(config)
     scanner = MarkdownScanner(vector_store)
-    
+
+    found = []
     for directory in directories:
         if not os.path.exists(directory):
             print(f"Directory not found: {directory}")
             continue
-            
+        found.append(directory)
+
         print(f"Scanning markdown files in: {directory}")
-        scanner.scan_markdown_directory(directory)
-        print(f"Finished scanning: {directory}")
-        
+        stats = scanner.scan_markdown_directory(directory, workers=workers, chunk_size=chunk_size, full=full)
+        print(f"Finished scanning: {directory} "
+              f"({stats['indexed']} indexed, {stats['removed']} removed, {stats['unchanged']} unchanged)")
+
         # Print summary of found tasks
         tasks = vector_store.tasks_collection.get(
             where={"type": "markdown_task"}
         )
-        
+
         if tasks and tasks['metadatas']:
             print("\nFound tasks:")
             for metadata in tasks['metadatas']:
@@ -30,16 +36,39 @@ def scan_markdown_directories(directories):
                 file_path = metadata.get('file_path', '')
                 print(f"- [{status}] {project} ({os.path.basename(file_path)})")
 
+    if watch and found:
+        print(f"Watching {', '.join(found)} for changes (Ctrl+C to stop)")
+        try:
+            scanner.watch(found, interval=interval, chunk_size=chunk_size)
+        except KeyboardInterrupt:
+            pass
+
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python scan_markdown.py /path/to/markdown/dir1 [/path/to/markdown/dir2 ...]")
-        print("\nThis script will scan markdown files for:")
-        print("- Tasks (- [ ] or - [x] format)")
-        print("- Projects and milestones")
-        print("- Tags (#tag format)")
-        print("- @mentions")
-        print("- Due dates (due: YYYY-MM-DD)")
-        print("- Priorities (priority: high/medium/low)")
-        sys.exit(1)
-    
-    scan_markdown_directories(sys.argv[1:])
+    parser = argparse.ArgumentParser(
+        description="Scan markdown files for task context.",
+        epilog="""This script will scan markdown files for:
+- Tasks (- [ ] or - [x] format)
+- Projects and milestones
+- Tags (#tag format)
+- @mentions
+- Due dates (due: YYYY-MM-DD)
+- Priorities (priority: high/medium/low)""",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('directories', nargs='+', metavar='DIR',
+                        help='markdown directories to scan')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='processes used to parse files (1 disables the pool; default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=100,
+                        help='files parsed before each batched store write (default: 100)')
+    parser.add_argument('--full', action='store_true',
+                        help='re-index every file instead of only changed ones')
+    parser.add_argument('--watch', action='store_true',
+                        help='keep running and index files as they change')
+    parser.add_argument('--interval', type=float, default=2.0,
+                        help='seconds file events are batched for in --watch mode, or between polls '
+                             'if watchdog is not installed (default: 2)')
+    args = parser.parse_args()
+
+    scan_markdown_directories(args.directories, workers=args.workers, chunk_size=args.chunk_size,
+                              full=args.full, watch=args.watch, interval=args.interval)
@@ -1,23 +1,48 @@
-import sys
+import argparse
 import os
-from app.nlp_processor import NLPProcessor
+import time
+import toml
+from app.vector_store import VectorStore
 
-def scan_projects(directories):
+def scan_projects(directories, workers=None, full_history=False):
     """Scan provided directories for project context."""
-    nlp = NLPProcessor()
-    
+    config = toml.load('config.toml') if os.path.exists('config.toml') else {}
+    git_config = config.get('git', {})
+    vector_store = VectorStore.from_config(config)
+
+    repos = []
     for directory in directories:
         if not os.path.exists(directory):
             print(f"Directory not found: {directory}")
             continue
-            
-        print(f"Scanning project: {directory}")
-        nlp.scan_project(directory)
-        print(f"Finished scanning: {directory}")
+        repos.append(directory)
+
+    def report(repo, result, done, total):
+        if result['error']:
+            print(f"[{done}/{total}] {repo}: error after {result['seconds']:.2f}s: {result['error']}")
+        else:
+            print(f"[{done}/{total}] {repo}: {result['added']} new commits in {result['seconds']:.2f}s")
+
+    print(f"Scanning {len(repos)} projects with {workers or 1} worker(s)")
+    start = time.perf_counter()
+    results = vector_store.scan_git_projects(
+        repos,
+        max_commits=git_config.get('max_commits', 100),
+        full_history=full_history or git_config.get('full_history', False),
+        workers=workers,
+        progress=report
+    )
+    added = sum(result['added'] for result in results.values())
+    print(f"Finished scanning {len(results)} projects: {added} new commits in {time.perf_counter() - start:.2f}s")
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python scan_projects.py /path/to/project1 [/path/to/project2 ...]")
-        sys.exit(1)
-    
-    scan_projects(sys.argv[1:])
+    parser = argparse.ArgumentParser(description="Scan git repositories for project context.")
+    parser.add_argument('directories', nargs='+', metavar='DIR',
+                        help='repositories to scan')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='processes used to read repositories (1 disables the pool; default: CPU count)')
+    parser.add_argument('--full-history', action='store_true',
+                        help='ingest the whole history instead of the newest [git] max_commits')
+    args = parser.parse_args()
+
+    scan_projects(args.directories, workers=args.workers, full_history=args.full_history)
@@ -0,0 +1,28 @@
+import pytest
+from app.tokenizer import RegexTokenizer, Tokenizer, get_tokenizer
+from benchmarks.tokenizer_parity import REFERENCE_CORPUS
+
+
+@pytest.fixture(scope='module')
+def tokenizers():
+    try:
+        return get_tokenizer('nltk'), get_tokenizer('regex')
+    except LookupError as e:
+        pytest.skip(f"NLTK data is not installed: {e}")
+
+
+@pytest.mark.parametrize('text', REFERENCE_CORPUS)
+def test_regex_tokenizer_matches_nltk(tokenizers, text):
+    reference, fast = tokenizers
+    assert fast.preprocess(text) == reference.preprocess(text)
+
+
+def test_batch_matches_single_texts(tokenizers):
+    _, fast = tokenizers
+    assert fast.preprocess_batch(REFERENCE_CORPUS) == [fast.preprocess(text) for text in REFERENCE_CORPUS]
+
+
+def test_tokenizer_needs_split():
+    with pytest.raises(TypeError):
+        Tokenizer()
+    assert issubclass(RegexTokenizer, Tokenizer)